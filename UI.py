@@ -9,6 +9,7 @@ import shutil
 import platform
 import re
 import threading
+import queue
 import webbrowser
 import urllib.request
 import subprocess
@@ -33,6 +34,9 @@ def _open_file(path: str) -> bool:
 	except Exception:
 		return False
 UPDATE_CHECK_INTERVAL_MS = 6 * 60 * 60 * 1000  # 6 hours
+LIVE_PREVIEW_DEBOUNCE_MS = 30  # Wait for a pause in typing before re-rendering
+LIVE_PREVIEW_POLL_MS = 30  # How often the Tk thread picks up rendered previews
+LIVE_PREVIEW_SIZE = (480, 640)
 
 
 def _parse_version(version_str: str) -> tuple:
@@ -52,44 +56,9 @@ def _is_newer_version(remote: str, local: str) -> bool:
 
 
 def _get_available_fonts():
-	"""Get all available fonts from config, ./fonts/ directory, and system"""
-	fonts = []  # Don't include "default" - it's a non-resizable bitmap font
-	
-	# Add fonts from config
-	config_fonts = list(CONFIG.get("fonts", {}).keys())
-	fonts.extend(config_fonts)
-	
-	# Scan user fonts directory for any .ttf/.TTF/.otf/.OTF files
-	fonts_dir = fn.ensure_user_fonts_dir()
-	if os.path.exists(fonts_dir):
-		for filename in os.listdir(fonts_dir):
-			if filename.lower().endswith(('.ttf', '.otf', '.ttc')):
-					# Remove extension and add to list if not already there
-					font_name = os.path.splitext(filename)[0]
-					if font_name not in fonts:
-						fonts.append(font_name)
-	
-	# Add common system fonts (platform-specific)
-	import platform
-	system = platform.system()
-	
-	if system == "Windows":
-		system_fonts_dir = "C:\\Windows\\Fonts"
-		common_fonts = ["Arial", "Times New Roman", "Courier New", "Verdana", "Tahoma", "Comic Sans MS", "Georgia", "Impact", "Trebuchet MS"]
-	elif system == "Darwin":  # macOS
-		system_fonts_dir = "/System/Library/Fonts"
-		common_fonts = ["Arial", "Helvetica", "Times New Roman", "Courier", "Verdana", "Georgia", "Monaco"]
-	else:  # Linux
-		system_fonts_dir = "/usr/share/fonts"
-		common_fonts = ["DejaVu Sans", "Liberation Sans", "Ubuntu"]
-	
-	# Check which common system fonts exist
-	if os.path.exists(system_fonts_dir):
-		for font_name in common_fonts:
-			if font_name not in fonts:
-				fonts.append(f"[System] {font_name}")
-	
-	return fonts
+	"""Get all available fonts from config, the fonts directories, and the system font catalog"""
+	# Don't include "default" - it's a non-resizable bitmap font
+	return fn.list_available_fonts()
 
 
 def _copy_user_fonts(font_paths) -> list:
@@ -107,6 +76,8 @@ def _copy_user_fonts(font_paths) -> list:
 		dest_path = os.path.join(fonts_dir, os.path.basename(font_path))
 		shutil.copy2(font_path, dest_path)
 		copied.append(dest_path)
+	if copied:
+		fn.invalidate_font_index()
 	return copied
 
 
@@ -255,9 +226,10 @@ def style_label(label, muted=False):
 
 class ImagePreviewWidget(ctk.CTkFrame):
 	"""Modular image preview widget"""
-	def __init__(self, master, parent_app: Optional['PixelTyperApp'] = None, **kwargs):
+	def __init__(self, master, parent_app: Optional['PixelTyperApp'] = None, target_size=(600, 750), **kwargs):
 		super().__init__(master, **kwargs)
 		self.parent_app = parent_app
+		self.target_size = target_size
 		self.configure(fg_color=COLORS["panel"])
 		
 		self.current_image_path = None
@@ -282,8 +254,7 @@ class ImagePreviewWidget(ctk.CTkFrame):
 			img = Image.open(image_path)
 			
 			# Use fixed target size for consistency (no shrinking)
-			target_width = 600
-			target_height = 750
+			target_width, target_height = self.target_size
 			
 			# Calculate scaling to fit within target while maintaining aspect ratio
 			img_ratio = img.width / img.height
@@ -305,6 +276,11 @@ class ImagePreviewWidget(ctk.CTkFrame):
 		except Exception as e:
 			self.preview_label.configure(text=f"Error loading image:\n{str(e)}", image=None)
 	
+	def show_image(self, img):
+		"""Display an already scaled PIL image (e.g. a live preview render)"""
+		self.current_photo = ctk.CTkImage(light_image=img, dark_image=img, size=img.size)
+		self.preview_label.configure(image=self.current_photo, text="")
+	
 	def clear(self):
 		"""Clear the preview"""
 		self.current_image_path = None
@@ -440,11 +416,28 @@ class SimpleOverlayTab(ctk.CTkFrame):
 		self.opacity_label.pack(side="left")
 		self.opacity_slider.configure(command=lambda v: self.opacity_value.set(f"{int(v)}%"))
 		
-		# Apply button
-		btn_apply = ctk.CTkButton(self, text="Apply Text Overlay", command=self.apply_overlay,
+		# Apply button, with the encoder profile used to save the result
+		apply_frame = ctk.CTkFrame(self, fg_color="transparent")
+		apply_frame.grid(row=4, column=0, padx=20, pady=20, sticky="ew")
+		btn_apply = ctk.CTkButton(apply_frame, text="Apply Text Overlay", command=self.apply_overlay,
 					height=40, font=ctk.CTkFont(size=14, weight="bold"))
 		style_button(btn_apply, "primary")
-		btn_apply.grid(row=4, column=0, padx=20, pady=20, sticky="ew")
+		btn_apply.pack(side="left", fill="x", expand=True, padx=(0, 10))
+		label_profile = ctk.CTkLabel(apply_frame, text="Encoder:")
+		style_label(label_profile, muted=True)
+		label_profile.pack(side="left", padx=(0, 5))
+		self.encoder_menu = ctk.CTkOptionMenu(apply_frame, values=fn.list_encoder_profiles(), width=110)
+		self.encoder_menu.configure(
+			fg_color=COLORS["surface_alt"],
+			button_color=COLORS["accent"],
+			button_hover_color=COLORS["accent_hover"],
+			text_color=COLORS["text"],
+			dropdown_fg_color=COLORS["surface"],
+			dropdown_hover_color=COLORS["surface_alt"],
+			dropdown_text_color=COLORS["text"]
+		)
+		self.encoder_menu.set("default")
+		self.encoder_menu.pack(side="left")
 		
 		# Status
 		self.last_output_path = None
@@ -601,10 +594,12 @@ class SimpleOverlayTab(ctk.CTkFrame):
 			color = self.color_entry.get().strip() or "black"
 			font_style = self.font_style_menu.get()
 			opacity = int(self.opacity_slider.get())
+			encoder_profile = self.encoder_menu.get()
 			
-			# Ask user where to save
+			# Ask user where to save (profiles that convert, e.g. "web", suggest their own extension)
 			basename = os.path.basename(self.image_path)
 			name, ext = os.path.splitext(basename)
+			ext = os.path.splitext(fn.resolve_encoder_profile(encoder_profile, f"{name}{ext}")[0])[1]
 			outputs_dir = fn.ensure_user_dir("outputs")
 			
 			# Ask user to choose save location
@@ -619,6 +614,7 @@ class SimpleOverlayTab(ctk.CTkFrame):
 			if not output_path:  # User cancelled
 				self.status_label.configure(text="Operation cancelled", text_color=COLORS["warning"])
 				return
+			output_path = fn.resolve_encoder_profile(encoder_profile, output_path)[0]
 			
 			# Ensure directory exists for the selected output path
 			output_dir = os.path.dirname(output_path)
@@ -633,7 +629,8 @@ class SimpleOverlayTab(ctk.CTkFrame):
 				font_size=font_size,
 				font_style=font_style,
 				output_path=output_path,
-				opacity=opacity
+				opacity=opacity,
+				encoder_profile=encoder_profile
 			)
 			
 			# Show success message with full path in UI (no popup)
@@ -768,11 +765,26 @@ class ApplyTemplateTab(ctk.CTkFrame):
 		self.font_style_entries = {}
 		self.opacity_entries = {}
 		self.original_font_data = {}  # Track original values
+		self.original_encoder_profile = "default"
 		self.update_button = None  # Reference to update button
+		self._live_preview = None  # fn.LivePreview, only touched by the preview worker thread
+		self._preview_request = None
+		self._preview_busy = False  # Worker is rendering a taken request; guarded by _preview_lock
+		self._preview_after_id = None
+		self._preview_poll_id = None
+		self._preview_lock = threading.Lock()
+		self._preview_event = threading.Event()
+		self._preview_thread = None
+		self._preview_results = queue.Queue()  # Rendered previews, handed from the worker to the Tk thread
 		self.configure(fg_color=COLORS["panel"])
 		
 		self.grid_columnconfigure(0, weight=1)
 		
+		# Live preview (re-rendered on a worker thread as fields change)
+		self.preview_widget = ImagePreviewWidget(self, parent_app=parent_app, target_size=LIVE_PREVIEW_SIZE,
+												 corner_radius=RADII["panel"])
+		self.preview_widget.grid(row=0, column=1, rowspan=6, padx=(0, 20), pady=10, sticky="nsew")
+		
 		# Image selection
 		img_frame = ctk.CTkFrame(self, fg_color=COLORS["surface"], corner_radius=RADII["panel"])
 		img_frame.grid(row=0, column=0, padx=20, pady=10, sticky="ew")
@@ -848,7 +860,25 @@ class ApplyTemplateTab(ctk.CTkFrame):
 			variable=self.show_preview_var,
 			text_color=COLORS["text"]
 		)
-		self.show_preview_check.pack(anchor="w")
+		self.show_preview_check.pack(side="left")
+		
+		# Encoder profile for saving; defaults to the template's, "Update Template" saves a change
+		self.encoder_menu = ctk.CTkOptionMenu(preview_frame, values=fn.list_encoder_profiles(), width=110,
+											  command=lambda _: self.check_for_changes())
+		self.encoder_menu.configure(
+			fg_color=COLORS["surface_alt"],
+			button_color=COLORS["accent"],
+			button_hover_color=COLORS["accent_hover"],
+			text_color=COLORS["text"],
+			dropdown_fg_color=COLORS["surface"],
+			dropdown_hover_color=COLORS["surface_alt"],
+			dropdown_text_color=COLORS["text"]
+		)
+		self.encoder_menu.set("default")
+		self.encoder_menu.pack(side="right")
+		label_profile = ctk.CTkLabel(preview_frame, text="Encoder:")
+		style_label(label_profile, muted=True)
+		label_profile.pack(side="right", padx=(0, 5))
 		
 		# Status
 		self.last_output_path = None
@@ -873,8 +903,7 @@ class ApplyTemplateTab(ctk.CTkFrame):
 		if path:
 			self.image_path = path
 			self.img_path_label.configure(text=os.path.basename(path))
-			# Don't show input image, only show output after processing
-			# self.preview_widget.load_image(path)
+			self.schedule_live_preview()
 			self.status_label.configure(text="Image loaded", text_color=COLORS["success"])
 	
 	def refresh_templates(self):
@@ -918,9 +947,7 @@ class ApplyTemplateTab(ctk.CTkFrame):
 			return
 		
 		try:
-			template_path = fn.get_user_data_path("coord_templates", f"{template_name}.json")
-			with open(template_path, "r") as f:
-				self.template_data = json.load(f)
+			self.template_data = fn.load_template(template_name)
 			
 			# Clear existing inputs
 			for widget in self.text_inputs_frame.winfo_children():
@@ -931,8 +958,15 @@ class ApplyTemplateTab(ctk.CTkFrame):
 			self.font_style_entries.clear()
 			self.original_font_data.clear()
 			
+			# Get available fonts from all sources (once for all fields)
+			template_fonts = _get_available_fonts()
+			
+			# Encoder profile saved with the template (if any)
+			self.original_encoder_profile = fn.template_encoder_profile(template_name) or "default"
+			self.encoder_menu.set(self.original_encoder_profile)
+			
 			# Create input fields for each coordinate
-			for point_name, point_data in self.template_data.items():
+			for point_name, point_data in fn.template_fields(self.template_data):
 				frame = ctk.CTkFrame(self.text_inputs_frame, fg_color=COLORS["surface_alt"], border_width=1, border_color=COLORS["border"], corner_radius=RADII["panel"])
 				frame.pack(fill="x", padx=5, pady=5)
 				
@@ -964,7 +998,7 @@ class ApplyTemplateTab(ctk.CTkFrame):
 				font_size_val = str(point_data.get("font_size", 20))
 				font_size_entry.insert(0, font_size_val)
 				font_size_entry.pack(side="left", padx=(0, 10))
-				_bind_int_mousewheel(font_size_entry, min_value=1, on_change=self.check_for_changes)
+				_bind_int_mousewheel(font_size_entry, min_value=1, on_change=self.on_field_changed)
 				self.font_size_entries[point_name] = font_size_entry
 				
 				# # Font color
@@ -987,8 +1021,7 @@ class ApplyTemplateTab(ctk.CTkFrame):
 				style_label(label_style, muted=True)
 				label_style.pack(side="left", padx=(0, 5))
 				
-				# Get available fonts from all sources
-				available_fonts = _get_available_fonts()
+				available_fonts = list(template_fonts)
 				font_style_val = point_data.get("font_style", "default")
 				# Fallback to first available font if saved font not found
 				if font_style_val not in available_fonts and available_fonts:
@@ -997,7 +1030,7 @@ class ApplyTemplateTab(ctk.CTkFrame):
 					available_fonts = ["default"]
 					font_style_val = "default"
 				
-				font_style_menu = ctk.CTkOptionMenu(main_frame, values=available_fonts, width=100, command=lambda _: self.check_for_changes())
+				font_style_menu = ctk.CTkOptionMenu(main_frame, values=available_fonts, width=100, command=lambda _: self.on_field_changed())
 				font_style_menu.configure(
 					fg_color=COLORS["surface_alt"],
 					button_color=COLORS["accent"],
@@ -1017,7 +1050,7 @@ class ApplyTemplateTab(ctk.CTkFrame):
 				label_opacity.pack(side="left", padx=(10, 5))
 				opacity_val = int(point_data.get("opacity", 100))
 				opacity_slider = ctk.CTkSlider(main_frame, from_=0, to=100, number_of_steps=100, width=80,
-											   command=lambda _=None: self.check_for_changes())
+											   command=lambda _=None: self.on_field_changed())
 				opacity_slider.set(opacity_val)
 				opacity_slider.pack(side="left", padx=(0, 5))
 				opacity_label = ctk.CTkLabel(main_frame, text=f"{opacity_val}%", width=50)
@@ -1026,7 +1059,7 @@ class ApplyTemplateTab(ctk.CTkFrame):
 
 				def _update_opacity_label(value, lbl=opacity_label):
 					lbl.configure(text=f"{int(value)}%")
-					self.check_for_changes()
+					self.on_field_changed()
 				opacity_slider.configure(command=_update_opacity_label)
 
 				self.opacity_entries[point_name] = opacity_slider
@@ -1040,21 +1073,111 @@ class ApplyTemplateTab(ctk.CTkFrame):
 				}
 				
 				# Bind change events to check for modifications
-				font_size_entry.bind("<KeyRelease>", lambda e: self.check_for_changes())
-				font_color_entry.bind("<KeyRelease>", lambda e: self.check_for_changes())
+				text_entry.bind("<KeyRelease>", lambda e: self.schedule_live_preview())
+				font_size_entry.bind("<KeyRelease>", lambda e: self.on_field_changed())
+				font_color_entry.bind("<KeyRelease>", lambda e: self.on_field_changed())
 				# Font style dropdown already has command callback
 			
-			self.status_label.configure(text=f"Template '{template_name}' loaded with {len(self.template_data)} points", text_color=COLORS["success"])
+			self.schedule_live_preview()
+			self.status_label.configure(text=f"Template '{template_name}' loaded with {sum(1 for _ in fn.template_fields(self.template_data))} points", text_color=COLORS["success"])
 			
 		except Exception as e:
 			messagebox.showerror("Error", f"Failed to load template: {e}")
 	
+	def on_field_changed(self):
+		"""Font settings of a field changed: refresh the update button and the live preview"""
+		self.check_for_changes()
+		self.schedule_live_preview()
+	
+	def schedule_live_preview(self):
+		"""Debounce preview requests so a burst of keystrokes renders once"""
+		if self._preview_after_id is not None:
+			self.after_cancel(self._preview_after_id)
+		self._preview_after_id = self.after(LIVE_PREVIEW_DEBOUNCE_MS, self._request_live_preview)
+	
+	def _request_live_preview(self):
+		"""Snapshot the field widgets (Tk thread) and hand them to the preview worker"""
+		self._preview_after_id = None
+		if not self.image_path or not self.template_data:
+			return
+		fields = []
+		for point_name, point_data in fn.template_fields(self.template_data):
+			if point_name not in self.text_entries:
+				continue
+			try:
+				font_size = int(self.font_size_entries[point_name].get().strip())
+			except ValueError:
+				font_size = int(point_data.get("font_size", 20))
+			font_size = max(1, font_size)
+			fields.append((
+				point_name,
+				point_data["x"],
+				point_data["y"],
+				self.text_entries[point_name].get().strip(),
+				self.font_style_entries[point_name].get() or "default",
+				font_size,
+				self.font_color_entries[point_name].get().strip() or "black",
+				int(self.opacity_entries[point_name].get()),
+				tuple(point_data.get("font_fallbacks") or ()),
+				fn.field_tiling(point_data, font_size),
+			))
+		with self._preview_lock:
+			self._preview_request = (self.image_path, self.preview_widget.target_size, fields)
+		self._preview_event.set()
+		if self._preview_thread is None:
+			self._preview_thread = threading.Thread(target=self._live_preview_worker, daemon=True)
+			self._preview_thread.start()
+		if self._preview_poll_id is None:
+			self._preview_poll_id = self.after(LIVE_PREVIEW_POLL_MS, self._poll_live_preview)
+	
+	def _live_preview_worker(self):
+		"""Render the latest requested preview; older requests are dropped, not queued. Never touches Tk."""
+		while True:
+			self._preview_event.wait()
+			self._preview_event.clear()
+			with self._preview_lock:
+				request, self._preview_request = self._preview_request, None
+				self._preview_busy = request is not None
+			if request is None:
+				continue
+			image_path, target_size, fields = request
+			try:
+				if self._live_preview is None or self._live_preview.image_path != image_path:
+					self._live_preview = fn.LivePreview(image_path, target_size)
+				self._live_preview.update(fields)
+				image = self._live_preview.render()
+			except Exception as e:
+				fn._debug(f"DEBUG UI: Live preview failed: {e}")
+			else:
+				self._preview_results.put(image)
+			with self._preview_lock:
+				self._preview_busy = False
+	
+	def _poll_live_preview(self):
+		"""Show the newest rendered preview (Tk thread; Tk calls from the worker aren't safe).
+		Keeps polling only while a request is waiting or being rendered."""
+		# Checked before draining: once the worker is idle, its last image is already queued
+		with self._preview_lock:
+			outstanding = self._preview_request is not None or self._preview_busy
+		image = None
+		try:
+			while True:
+				image = self._preview_results.get_nowait()
+		except queue.Empty:
+			pass
+		if image is not None:
+			self.preview_widget.show_image(image)
+		if outstanding:
+			self._preview_poll_id = self.after(LIVE_PREVIEW_POLL_MS, self._poll_live_preview)
+		else:
+			self._preview_poll_id = None
+	
 	def check_for_changes(self):
 		"""Check if any font fields have been modified and enable/disable update button"""
 		if not self.update_button:
 			return
 		
-		has_changes = False
+		has_changes = self.encoder_menu.get() != self.original_encoder_profile
 		for point_name in self.original_font_data.keys():
 			if point_name in self.font_size_entries:
 				current_size = self.font_size_entries[point_name].get().strip()
@@ -1083,7 +1206,7 @@ class ApplyTemplateTab(ctk.CTkFrame):
 			entry.delete(0, "end")
 			entry.insert(0, color)
 			# Trigger change detection
-			self.check_for_changes()
+			self.on_field_changed()
 	
 	def apply_template(self):
 		"""Apply template with user-provided texts"""
@@ -1131,10 +1254,12 @@ class ApplyTemplateTab(ctk.CTkFrame):
 		
 		try:
 			template_name = self.template_menu.get()
+			encoder_profile = self.encoder_menu.get()
 			
-			# Ask user where to save
+			# Ask user where to save (profiles that convert, e.g. "web", suggest their own extension)
 			basename = os.path.basename(self.image_path)
 			name, ext = os.path.splitext(basename)
+			ext = os.path.splitext(fn.resolve_encoder_profile(encoder_profile, f"{name}{ext}")[0])[1]
 			
 			outputs_dir = fn.ensure_user_dir("outputs")
 			
@@ -1150,6 +1275,7 @@ class ApplyTemplateTab(ctk.CTkFrame):
 			if not output_path:  # User cancelled
 				self.status_label.configure(text="Operation cancelled", text_color=COLORS["warning"])
 				return
+			output_path = fn.resolve_encoder_profile(encoder_profile, output_path)[0]
 			
 			# Ensure directory exists for the selected output path
 			output_dir = os.path.dirname(output_path)
@@ -1163,7 +1289,8 @@ class ApplyTemplateTab(ctk.CTkFrame):
 				text_color="black",
 				font_size=20,
 				font_overrides=font_overrides,
-				output_path=output_path
+				output_path=output_path,
+				encoder_profile=encoder_profile
 			)
 			
 			# Show the output image in popup if checkbox is checked
@@ -1202,7 +1329,7 @@ class ApplyTemplateTab(ctk.CTkFrame):
 			font_updates = {}
 			
 			# Collect font settings for each point
-			for point_name in self.template_data.keys():
+			for point_name, _ in fn.template_fields(self.template_data):
 				font_size_str = self.font_size_entries[point_name].get().strip()
 				font_color = self.font_color_entries[point_name].get().strip()
 				font_style = self.font_style_entries[point_name].get()  # OptionMenu returns string directly
@@ -1229,6 +1356,9 @@ class ApplyTemplateTab(ctk.CTkFrame):
 			
 			# Update the template
 			fn.update_template_fonts(template_name, font_updates)
+			encoder_profile = self.encoder_menu.get()
+			if encoder_profile != self.original_encoder_profile:
+				fn.set_template_encoder_profile(template_name, None if encoder_profile == "default" else encoder_profile)
 			
 			# Reload template to reflect changes
 			self.on_template_selected(template_name)
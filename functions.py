@@ -1,8 +1,31 @@
-from PIL import Image, ImageDraw, ImageFont, ImageColor
+from PIL import Image, ImageDraw, ImageFont, ImageColor, ImageChops
 import cv2
 import json, os
+import io
+import argparse
 import sys, platform
 import shutil
+import string
+import math
+import re
+import struct
+import tarfile
+import zlib
+import bisect
+import copy
+import csv
+import itertools
+import hashlib
+import sqlite3
+import tempfile
+import threading
+from multiprocessing import shared_memory
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from collections.abc import Mapping
+from types import MappingProxyType
 
 import tkinter as tk
 from tkinter import simpledialog
@@ -33,9 +56,10 @@ def get_user_data_path(*parts):
 	return os.path.join(get_user_data_dir(), *parts)
 
 def ensure_user_dir(*parts):
-	"""Ensure a directory exists inside the app's user data directory and return it."""
+	"""Ensure a directory exists inside the app's user data directory and return it (thread-safe)."""
 	path = get_user_data_path(*parts)
-	os.makedirs(path, exist_ok=True)
+	with _USER_DIR_LOCK:
+		os.makedirs(path, exist_ok=True)
 	return path
 
 
@@ -50,16 +74,17 @@ def ensure_user_fonts_dir():
 	Ensure user fonts directory exists. If it's empty and bundled fonts exist,
 	copy bundled fonts into app data once.
 	"""
-	fonts_dir = ensure_user_dir("fonts")
-	if _is_dir_empty(fonts_dir):
-		bundled_fonts_dir = get_resource_path("fonts")
-		if os.path.isdir(bundled_fonts_dir):
-			for filename in os.listdir(bundled_fonts_dir):
-				if filename.lower().endswith((".ttf", ".otf", ".ttc")):
-					src = os.path.join(bundled_fonts_dir, filename)
-					dst = os.path.join(fonts_dir, filename)
-					if not os.path.exists(dst):
-						shutil.copy2(src, dst)
+	with _USER_DIR_LOCK:
+		fonts_dir = ensure_user_dir("fonts")
+		if _is_dir_empty(fonts_dir):
+			bundled_fonts_dir = get_resource_path("fonts")
+			if os.path.isdir(bundled_fonts_dir):
+				for filename in os.listdir(bundled_fonts_dir):
+					if filename.lower().endswith((".ttf", ".otf", ".ttc")):
+						src = os.path.join(bundled_fonts_dir, filename)
+						dst = os.path.join(fonts_dir, filename)
+						if not os.path.exists(dst):
+							shutil.copy2(src, dst)
 	return fonts_dir
 
 
@@ -68,6 +93,140 @@ APP_NAME = CONFIG.get("app_name", "PixelTyper")
 APP_VERSION = CONFIG.get("app_version", "1.0")
 DEBUG = CONFIG.get("debug", "").lower() in ("1", "true", "yes", "on")
 
+# Serializes directory creation (and the one-time font copy) in the user data dir
+_USER_DIR_LOCK = threading.RLock()
+
+# LRU cache of loaded fonts keyed by (resolved path, size, face). FreeType faces
+# aren't safe to share between threads, so every thread keeps its own cache;
+# clearing bumps the generation and each thread drops its fonts on next use.
+_FONT_CACHE_LOCAL = threading.local()
+_FONT_CACHE_GENERATION = 0
+_FONT_CACHE_MAX = max(1, int(CONFIG.get("font_cache_size", 64)))
+_FONT_CACHE_STATS = {"hits": 0, "misses": 0, "evictions": 0}
+_FONT_CACHE_LOCK = threading.Lock()
+
+# Rendered text masks keyed by (font file, face, size, text, anchor, subpixel start), bounded by bytes
+_TEXT_MASK_CACHE: "OrderedDict[tuple, tuple]" = OrderedDict()
+_TEXT_MASK_CACHE_BUDGET = max(0, int(CONFIG.get("text_mask_cache_bytes", 64 * 1024 * 1024)))
+_TEXT_MASK_CACHE_BYTES = 0
+_TEXT_MASK_CACHE_STATS = {"hits": 0, "misses": 0, "evictions": 0}
+_TEXT_MASK_CACHE_LOCK = threading.Lock()
+
+# Decoded RGB base images keyed by path, revalidated by (mtime, size), bounded by bytes
+_IMAGE_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
+_IMAGE_CACHE_BUDGET = max(0, int(CONFIG.get("image_cache_bytes", 256 * 1024 * 1024)))
+_IMAGE_CACHE_BYTES = 0
+_IMAGE_CACHE_STATS = {"hits": 0, "misses": 0, "evictions": 0}
+_IMAGE_CACHE_LOCK = threading.Lock()
+
+# Named Image.save settings per output format; "format" makes a profile convert to that format.
+# Profiles in config.json "encoder_profiles" are added to (or replace) these.
+ENCODER_PROFILES = {
+	"default": {},
+	"fast": {
+		"PNG": {"compress_level": 1},
+		"JPEG": {"quality": 85},
+		"WEBP": {"quality": 80, "method": 0},
+		"AVIF": {"quality": 60, "speed": 10},
+	},
+	"balanced": {
+		"PNG": {"compress_level": 6},
+		"JPEG": {"quality": 90, "optimize": True, "progressive": True},
+		"WEBP": {"quality": 85, "method": 4},
+		"AVIF": {"quality": 70, "speed": 6},
+	},
+	"archival": {
+		"PNG": {"compress_level": 9, "optimize": True},
+		"JPEG": {"quality": 95, "subsampling": "4:4:4", "optimize": True},
+		"WEBP": {"lossless": True, "method": 6},
+		"AVIF": {"quality": 90, "speed": 4, "subsampling": "4:4:4"},
+		"TIFF": {"compression": "tiff_lzw"},
+	},
+	"web": {
+		"format": "WEBP",
+		"WEBP": {"quality": 80, "method": 4},
+	},
+}
+# ArchiveSink: formats stored without re-deflating in a ZIP, and the entry index written beside an archive
+ARCHIVE_STORED_FORMATS = frozenset({"JPEG", "PNG", "WEBP", "AVIF", "GIF", "JPEG2000", "MPO"})
+ARCHIVE_INDEX_SUFFIX = ".index.jsonl"
+_FORMAT_EXTENSIONS = {"JPEG": ".jpg", "PNG": ".png", "WEBP": ".webp", "AVIF": ".avif", "TIFF": ".tif", "BMP": ".bmp", "GIF": ".gif"}
+
+# Tiled watermark fields: rendered tiles, and per-image-size patterns cut from them (large, so few are kept)
+TILE_CACHE_ENTRIES = 32
+TILED_MASK_CACHE_ENTRIES = 4
+TILED_BAND_HEIGHT = 32
+# Inked stretch of a band profile; gaps of up to 8 blank columns are bridged to keep the paste count down
+_INKED_RUN = re.compile(rb"[^\x00]+(?:\x00{1,8}[^\x00]+)*")
+_TILE_CACHE: "OrderedDict[tuple, Image.Image]" = OrderedDict()
+_TILED_MASK_CACHE: "OrderedDict[tuple, list]" = OrderedDict()
+_TILE_CACHE_LOCK = threading.Lock()
+
+# Per-glyph atlases for fields with "render_mode": "atlas", keyed like the text-mask cache.
+# An atlas holds its FreeType font, so like the font cache they are kept per thread
+# and dropped when the font cache generation changes.
+GLYPH_ATLAS_VERIFY_STRINGS = 4
+GLYPH_ATLAS_TOLERANCE = max(0, int(CONFIG.get("glyph_atlas_tolerance", 2)))
+_GLYPH_ATLAS_LOCAL = threading.local()
+
+# Names of outputs saved without an explicit path (see OutputNamer), and how many
+# levels of hash-prefix folders to spread them over
+OUTPUT_NAME_PATTERN = CONFIG.get("output_name_pattern", "{stem}_edited")
+OUTPUT_SHARD_LEVELS = max(0, int(CONFIG.get("output_shard_levels", 0)))
+# OutputNamer: names remembered for collision checks, folders remembered as created,
+# and pattern fields that make every name unique on their own
+OUTPUT_NAMER_MAX_NAMES = max(1, int(CONFIG.get("output_namer_max_names", 1000000)))
+OUTPUT_NAMER_FOLDERS = 4096
+_UNIQUE_NAME_FIELDS = frozenset(("index", "counter", "hash"))
+
+# Font name -> file path index, rebuilt when one of the scanned directories changes
+FONT_EXTENSIONS = ['.ttf', '.TTF', '.otf', '.OTF', '.ttc', '.TTC']
+FONT_INDEX_RECHECK_SECONDS = 1.0
+# Names that resolved to nothing are looked up again after this long (the font may have been installed)
+FONT_MISS_RETRY_SECONDS = 30.0
+_FONT_INDEX: dict = {}
+_FONT_MISSES: dict = {}
+_FONT_INDEX_NAMES: list = []
+_FONT_INDEX_DIRS: dict = {}
+_FONT_INDEX_CHECKED_AT = 0.0
+
+# Persistent catalog of installed system fonts (user data dir), loaded lazily
+FONT_CATALOG_FILE = "font_catalog.json"
+FONT_CATALOG_VERSION = 1
+_FONT_CATALOG: dict = {}
+_SYSTEM_FONTS: dict = {}
+_SYSTEM_FONT_FILES: dict = {}
+_SYSTEM_FONTS_READY = False
+
+# Per-font glyph coverage (cmap code point ranges), persisted in the user data dir
+GLYPH_COVERAGE_FILE = "glyph_coverage.json"
+GLYPH_COVERAGE_VERSION = 1
+_GLYPH_COVERAGE: dict = {}
+_GLYPH_COVERAGE_DISK = None
+_GLYPH_COVERAGE_LOCK = threading.Lock()
+
+# SQLite index of coord_templates/ (user data dir), created on first use
+TEMPLATE_INDEX_FILE = "template_index.sqlite3"
+# While the directory's mtime is unchanged, files are only re-stat'ed this often, to catch
+# templates other programs rewrote in place (this app's own writes call TemplateStore.refresh())
+TEMPLATE_INDEX_RESTAT_SECONDS = 30.0
+_TEMPLATE_STORE = None
+_TEMPLATE_STORE_LOCK = threading.Lock()
+
+# Rows read ahead by render_batch() to find fields that are the same in every row
+BATCH_LOOKAHEAD_ROWS = 256
+# Process-pool batches: rows per task and retries of a row whose worker crashed
+BATCH_CHUNK_SIZE = 16
+BATCH_MAX_RETRIES = 2
+# stamp_directory(): files picked up by the walk, and the settings record kept in the output tree
+STAMP_IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tif', '.tiff', '.webp')
+STAMP_MANIFEST_FILE = ".pixeltyper_stamp.json"
+
+# Parsed templates keyed by path, revalidated by (mtime, size)
+_TEMPLATE_CACHE: dict = {}
+_TEMPLATE_CACHE_LOCK = threading.Lock()
+_FONT_INDEX_LOCK = threading.RLock()
+
 def _debug(message: str) -> None:
 	if DEBUG:
 		print(message)
@@ -92,111 +251,1614 @@ def _normalize_color(color):
 			return (0, 0, 0)
 	return (0, 0, 0)
 
-def _draw_text(image: Image.Image, position, text, color, font, opacity=100) -> Image.Image:
-	opacity = _clamp_opacity(opacity)
-	rgb = _normalize_color(color)
+def _line_spacing(font, spacing=4) -> int:
+	"""Distance between the tops of consecutive lines, the way ImageDraw.multiline_text spaces them."""
+	return font.getbbox("A")[3] + spacing
+
+def _layout_runs(position, runs, font):
+	"""
+	Yield ((x, baseline), run, run_font) for runs laid out on the primary font's baseline.
+	
+	A newline inside a run starts a new line back at the original x, one line
+	height (from the primary font) further down, like single-font multiline text.
+	"""
+	left, y = position
+	x = left
+	baseline = y + font.getmetrics()[0]
+	for run, run_font in runs:
+		for number, line in enumerate(run.split("\n")):
+			if number:
+				x = left
+				baseline += _line_spacing(font)
+			if line:
+				yield (x, baseline), line, run_font
+				x += run_font.getlength(line)
+
+def _text_mask(font, text, anchor, start):
+	"""Return the cached (mask, offset) for a single line of text, rendering it on a miss."""
+	global _TEXT_MASK_CACHE_BYTES
+	key = (os.path.abspath(font.path), font.index, font.size, text, anchor, start)
+	with _TEXT_MASK_CACHE_LOCK:
+		entry = _TEXT_MASK_CACHE.get(key)
+		if entry is not None:
+			_TEXT_MASK_CACHE.move_to_end(key)
+			_TEXT_MASK_CACHE_STATS["hits"] += 1
+			return entry
+		_TEXT_MASK_CACHE_STATS["misses"] += 1
+	core, offset = font.getmask2(text, "L", anchor=anchor, start=start)
+	mask = Image.Image()._new(core)
+	entry = (mask, offset)
+	nbytes = mask.width * mask.height
+	if nbytes > _TEXT_MASK_CACHE_BUDGET:
+		return entry
+	with _TEXT_MASK_CACHE_LOCK:
+		if key not in _TEXT_MASK_CACHE:
+			_TEXT_MASK_CACHE[key] = entry
+			_TEXT_MASK_CACHE_BYTES += nbytes
+		while _TEXT_MASK_CACHE_BYTES > _TEXT_MASK_CACHE_BUDGET and _TEXT_MASK_CACHE:
+			_, (old_mask, _) = _TEXT_MASK_CACHE.popitem(last=False)
+			_TEXT_MASK_CACHE_BYTES -= old_mask.width * old_mask.height
+			_TEXT_MASK_CACHE_STATS["evictions"] += 1
+	return entry
+
+class GlyphAtlas:
+	"""
+	Pre-rasterized glyphs of one font/size, composed into text masks without a
+	FreeType layout per string.
+	
+	Meant for short-alphabet fields (serial numbers, dates, seat numbers) whose
+	strings are unique per row. Glyphs are placed at the font's advances plus pair
+	kerning and merged the way Pillow merges them (screen blend). Strings that bring a new
+	glyph or pair, and the first few strings overall, are checked against the
+	font's own rendering; if one differs by more than the tolerance the atlas
+	disables itself and callers fall back to normal drawing.
+	"""
+	
+	def __init__(self, font, tolerance=None):
+		self.font = font
+		self.tolerance = GLYPH_ATLAS_TOLERANCE if tolerance is None else tolerance
+		self.disabled = False
+		# Lookups are lock-free; FreeType calls on the font are serialized
+		self._lock = threading.RLock()
+		self._glyphs = {}
+		self._advances = {}
+		self._kerning = {}
+		self._verified_strings = 0
+	
+	def _advance(self, char):
+		advance = self._advances.get(char)
+		if advance is None:
+			with self._lock:
+				advance = self._advances[char] = round(self.font.getlength(char) * 64)
+		return advance
+	
+	def _compose(self, text, start):
+		"""Return (mask, offset, fresh); fresh is True when a glyph or pair was seen for the first time."""
+		# FreeType positions glyphs on a 26.6 fixed-point pen and rounds each one to
+		# whole pixels, so one raster per glyph plus the rounded pen gives the same mask
+		start_x = round(start[0] * 64)
+		shift_y = -((32 - round(start[1] * 64)) >> 6)
+		glyphs, kerning = self._glyphs, self._kerning
+		fresh = False
+		pen = 0
+		previous = None
+		parts = []
+		for char in text:
+			if previous is not None:
+				pair = previous + char
+				kern = kerning.get(pair)
+				if kern is None:
+					with self._lock:
+						kern = kerning[pair] = round(self.font.getlength(pair) * 64) - self._advance(previous) - self._advance(char)
+					fresh = True
+				pen += kern
+			glyph = glyphs.get(char)
+			if glyph is None:
+				with self._lock:
+					core, offset = self.font.getmask2(char, "L")
+					glyph = glyphs[char] = (Image.Image()._new(core), offset, self._advance(char))
+				fresh = True
+			mask, offset, advance = glyph
+			if mask.width and mask.height:
+				parts.append((((pen + start_x + 32) >> 6) + offset[0], shift_y + offset[1], mask))
+			pen += advance
+			previous = char
+		if not parts:
+			return Image.new("L", (0, 0)), (0, 0), fresh
+		left = min(x for x, _, _ in parts)
+		top = min(y for _, y, _ in parts)
+		right = max(x + mask.width for x, _, mask in parts)
+		bottom = max(y + mask.height for _, y, mask in parts)
+		canvas = Image.new("L", (right - left, bottom - top), 0)
+		edge = 0
+		for x, y, mask in parts:
+			box = (x - left, y - top, x - left + mask.width, y - top + mask.height)
+			if box[0] >= edge:
+				canvas.paste(mask, box)
+			else:
+				# Overlapping glyph boxes: merge the way FreeType coverage is combined (screen)
+				canvas.paste(ImageChops.screen(canvas.crop(box), mask), box)
+			edge = max(edge, box[2])
+		return canvas, (left, top), fresh
+	
+	def compose(self, text, start=(0.0, 0.0)):
+		"""Compose (mask, offset) for a single line of text, like FreeTypeFont.getmask2(text, "L", start=start)."""
+		return self._compose(text, start)[:2]
+	
+	def _difference(self, text, start, mask, offset) -> int:
+		with self._lock:
+			core, ref_offset = self.font.getmask2(text, "L", start=start)
+		reference = Image.Image()._new(core)
+		left = min(offset[0], ref_offset[0])
+		top = min(offset[1], ref_offset[1])
+		size = (max(offset[0] + mask.width, ref_offset[0] + reference.width) - left,
+				max(offset[1] + mask.height, ref_offset[1] + reference.height) - top)
+		if size[0] <= 0 or size[1] <= 0:
+			return 0
+		ours = Image.new("L", size, 0)
+		ours.paste(mask, (offset[0] - left, offset[1] - top))
+		theirs = Image.new("L", size, 0)
+		theirs.paste(reference, (ref_offset[0] - left, ref_offset[1] - top))
+		return ImageChops.difference(ours, theirs).getextrema()[1]
+	
+	def verify(self, text, start=(0.0, 0.0)) -> int:
+		"""Return the largest per-pixel difference between the composed mask and the font's own rendering."""
+		mask, offset = self.compose(text, start)
+		return self._difference(text, start, mask, offset)
+	
+	def mask(self, text, start=(0.0, 0.0)):
+		"""Return (mask, offset) for text, or None when the atlas can't stand in for the font."""
+		if self.disabled or not text or "\n" in text:
+			return None
+		mask, offset, fresh = self._compose(text, start)
+		if fresh or self._verified_strings < GLYPH_ATLAS_VERIFY_STRINGS:
+			difference = self._difference(text, start, mask, offset)
+			if difference > self.tolerance:
+				self.disabled = True
+				print(f"Warning: Glyph atlas for {os.path.basename(self.font.path)} {self.font.size}px differs from normal rendering "
+					  f"by {difference} on '{text}', falling back to normal drawing")
+				return None
+			self._verified_strings += 1
+		return mask, offset
+
+def _get_glyph_atlas(font):
+	"""Return this thread's GlyphAtlas for a font, or None if the font can't use one."""
+	if not isinstance(font, ImageFont.FreeTypeFont) or not isinstance(font.path, str):
+		return None
+	local = _GLYPH_ATLAS_LOCAL
+	if getattr(local, "generation", None) != _FONT_CACHE_GENERATION:
+		local.atlases = {}
+		local.generation = _FONT_CACHE_GENERATION
+	key = (os.path.abspath(font.path), font.index, font.size)
+	atlas = local.atlases.get(key)
+	# A font reloaded after eviction gets a fresh atlas rather than sharing the old face
+	if atlas is None or atlas.font is not font:
+		atlas = local.atlases[key] = GlyphAtlas(font)
+	return atlas
+
+def _paste_text(image: Image.Image, xy, text, fill, font, anchor=None, atlas=None) -> None:
+	"""
+	Same pixels as ImageDraw.Draw(image).text(xy, text, fill, font, anchor), but single
+	lines in a FreeType font are pasted through a cached mask instead of re-rasterized.
+	An atlas, when given, composes the mask from cached glyphs instead.
+	"""
+	if (image.mode not in ("RGB", "RGBA") or not isinstance(font, ImageFont.FreeTypeFont)
+			or not isinstance(font.path, str) or "\n" in text):
+		ImageDraw.Draw(image).text(xy, text, fill=fill, font=font, anchor=anchor)
+		return
+	# Mirror ImageDraw.text: integer origin plus the fractional part as the subpixel start
+	start = (math.modf(xy[0])[0], math.modf(xy[1])[0])
+	entry = atlas.mask(text, start) if atlas is not None and anchor is None else None
+	if entry is None:
+		if not _TEXT_MASK_CACHE_BUDGET:
+			ImageDraw.Draw(image).text(xy, text, fill=fill, font=font, anchor=anchor)
+			return
+		entry = _text_mask(font, text, anchor, start)
+	mask, offset = entry
+	if mask.width and mask.height:
+		image.paste(fill, (int(xy[0]) + offset[0], int(xy[1]) + offset[1]), mask)
+
+def get_text_mask_cache_stats() -> dict:
+	"""Return hit/miss/eviction counters and current size of the rendered text-mask cache."""
+	with _TEXT_MASK_CACHE_LOCK:
+		stats = dict(_TEXT_MASK_CACHE_STATS)
+		stats["entries"] = len(_TEXT_MASK_CACHE)
+		stats["bytes"] = _TEXT_MASK_CACHE_BYTES
+		stats["budget"] = _TEXT_MASK_CACHE_BUDGET
+	return stats
+
+def set_text_mask_cache_budget(max_bytes: int) -> None:
+	"""Change the text-mask cache budget in bytes (0 disables it), evicting masks as needed."""
+	global _TEXT_MASK_CACHE_BUDGET, _TEXT_MASK_CACHE_BYTES
+	with _TEXT_MASK_CACHE_LOCK:
+		_TEXT_MASK_CACHE_BUDGET = max(0, int(max_bytes))
+		while _TEXT_MASK_CACHE_BYTES > _TEXT_MASK_CACHE_BUDGET and _TEXT_MASK_CACHE:
+			_, (old_mask, _) = _TEXT_MASK_CACHE.popitem(last=False)
+			_TEXT_MASK_CACHE_BYTES -= old_mask.width * old_mask.height
+			_TEXT_MASK_CACHE_STATS["evictions"] += 1
+
+def clear_text_mask_cache() -> None:
+	"""Drop every cached text mask and reset the counters."""
+	global _TEXT_MASK_CACHE_BYTES
+	with _TEXT_MASK_CACHE_LOCK:
+		_TEXT_MASK_CACHE.clear()
+		_TEXT_MASK_CACHE_BYTES = 0
+		for key in _TEXT_MASK_CACHE_STATS:
+			_TEXT_MASK_CACHE_STATS[key] = 0
+
+def _draw_runs(image: Image.Image, position, runs, fill, font) -> None:
+	"""Draw (text, font) runs left to right on the baseline of the field's primary font."""
+	for xy, run, run_font in _layout_runs(position, runs, font):
+		_paste_text(image, xy, run, fill, run_font, anchor="ls")
+
+def _text_runs(text, font, fallback_fonts):
+	"""Split text into per-font runs, or return None when the primary font covers it all."""
+	if not fallback_fonts or not isinstance(font, ImageFont.FreeTypeFont):
+		return None
+	runs = _split_font_runs(text, [font] + list(fallback_fonts))
+	if len(runs) == 1 and runs[0][1] is font:
+		return None
+	return runs
+
+def _text_bbox(draw, position, text, font, runs=None):
+	"""Pixel bounding box (left, top, right, bottom) that drawing the text can touch."""
+	if not runs:
+		return draw.textbbox(position, text, font=font)
+	boxes = [draw.textbbox(xy, run, font=run_font, anchor="ls") for xy, run, run_font in _layout_runs(position, runs, font)]
+	return (min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+def _clip_box(box, size):
+	"""Round a bounding box outwards (with a 1px margin) and clip it to the image, or return None if empty."""
+	left = max(0, math.floor(box[0]) - 1)
+	top = max(0, math.floor(box[1]) - 1)
+	right = min(size[0], math.ceil(box[2]) + 1)
+	bottom = min(size[1], math.ceil(box[3]) + 1)
+	if right <= left or bottom <= top:
+		return None
+	return (left, top, right, bottom)
+
+def _draw_text(image: Image.Image, position, text, color, font, opacity=100, fallback_fonts=None) -> Image.Image:
+	return _draw_text_rgb(image, position, text, _normalize_color(color), font, _clamp_opacity(opacity), fallback_fonts)
+
+def _boxes_overlap(a, b) -> bool:
+	return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+def _composite_translucent(image: Image.Image, items) -> Image.Image:
+	"""
+	Draw translucent texts onto one shared overlay and composite it once.
+	
+	items are (position, text, font, runs, rgba_fill, box, atlas) tuples whose clipped
+	bounding boxes don't overlap each other, so drawing them on one overlay gives
+	the same pixels as compositing them one after another. Only the union of
+	their boxes is cropped, composited and pasted back, keeping the base in its mode.
+	"""
+	# Keep each local origin non-negative: Pillow truncates coordinates towards zero,
+	# so a negative fractional position would rasterize differently than on the full image
+	left = min(min(box[0], max(0, math.floor(position[0]))) for position, _, _, _, _, box, _ in items)
+	top = min(min(box[1], max(0, math.floor(position[1]))) for position, _, _, _, _, box, _ in items)
+	right = max(box[2] for _, _, _, _, _, box, _ in items)
+	bottom = max(box[3] for _, _, _, _, _, box, _ in items)
+	region = image.crop((left, top, right, bottom))
+	if region.mode != "RGBA":
+		region = region.convert("RGBA")
+	overlay = Image.new("RGBA", region.size, (0, 0, 0, 0))
+	for position, text, font, runs, fill, _, atlas in items:
+		local_position = (position[0] - left, position[1] - top)
+		if runs:
+			_draw_runs(overlay, local_position, runs, fill, font)
+		else:
+			_paste_text(overlay, local_position, text, fill, font, atlas=atlas)
+	region = Image.alpha_composite(region, overlay)
+	image.paste(region if image.mode == "RGBA" else region.convert(image.mode), (left, top))
+	return image
+
+def _draw_text_rgb(image: Image.Image, position, text, rgb, font, opacity=100, fallback_fonts=None, runs=None, atlas=None) -> Image.Image:
+	"""Draw text with an already normalized RGB color and clamped opacity, optionally through a glyph atlas."""
+	if runs is None:
+		runs = _text_runs(text, font, fallback_fonts)
 	if opacity >= 100:
-		draw = ImageDraw.Draw(image)
-		draw.text(position, text, fill=rgb, font=font)
+		if runs:
+			_draw_runs(image, position, runs, rgb, font)
+		else:
+			_paste_text(image, position, text, rgb, font, atlas=atlas)
+		return image
+	
+	# Translucent: composite an overlay only inside the text's bounding box
+	if image.mode not in ("RGB", "RGBA"):
+		image = image.convert("RGBA")
+	box = _clip_box(_text_bbox(ImageDraw.Draw(image), position, text, font, runs), image.size)
+	if box is None:
 		return image
-	# Draw with alpha on overlay, then composite
-	base = image.convert("RGBA")
-	overlay = Image.new("RGBA", base.size, (0, 0, 0, 0))
-	odraw = ImageDraw.Draw(overlay)
-	odraw.text(position, text, fill=(*rgb, int(255 * (opacity / 100))), font=font)
-	return Image.alpha_composite(base, overlay)
+	fill = (*rgb, int(255 * (opacity / 100)))
+	return _composite_translucent(image, [(position, text, font, runs, fill, box, atlas)])
 
-def _load_font(font_name, font_size=20):
-	"""Load font from config, ./fonts/ directory, or system fonts"""
-	if font_name == "default" or not font_name:
-		return ImageFont.load_default()
+def _font_identity(font, name=None):
+	"""A JSON-friendly id for a loaded font: its file and face, or the requested name for built-in fonts."""
+	path = getattr(font, "path", None)
+	if isinstance(path, str):
+		return (os.path.abspath(path), font.index, font.size)
+	return name
+
+def _text_coverage(text, font, runs=None):
+	"""Render text drawn at (0, 0) into a tight "L" coverage mask; returns (mask, (left, top)) of its box."""
+	left, top, right, bottom = _text_bbox(ImageDraw.Draw(Image.new("L", (1, 1))), (0, 0), text, font, runs)
+	mask = Image.new("L", (max(1, right - left), max(1, bottom - top)), 0)
+	if runs:
+		_draw_runs(mask, (-left, -top), runs, 255, font)
+	else:
+		_paste_text(mask, (-left, -top), text, 255, font)
+	return mask, (left, top)
+
+def _tile_mask(text, font, runs, opacity, angle, spacing):
+	"""
+	One repeat of a tiled watermark: the text rotated by `angle` degrees with its
+	opacity folded in, padded by `spacing` and laid out as a two-row brick so the
+	copies line up diagonally. Cached; the result is shared, don't draw on it.
+	"""
+	key = (_font_identity(font), text, tuple(_font_identity(run_font) for _, run_font in runs or ()), opacity, angle, spacing)
+	with _TILE_CACHE_LOCK:
+		tile = _TILE_CACHE.get(key)
+		if tile is not None:
+			_TILE_CACHE.move_to_end(key)
+			return tile
+	mask, _ = _text_coverage(text, font, runs)
+	if opacity < 100:
+		alpha = int(255 * (opacity / 100))
+		mask = mask.point(lambda value: value * alpha // 255)
+	if angle % 360:
+		mask = mask.rotate(angle, Image.Resampling.BILINEAR, expand=True)
+	cell_width, cell_height = mask.width + spacing, mask.height + spacing
+	tile = Image.new("L", (cell_width, cell_height * 2), 0)
+	tile.paste(mask, (0, 0))
+	# Second row shifted by half a cell, wrapped around the tile's right edge
+	tile.paste(mask, (cell_width // 2, cell_height))
+	tile.paste(mask, (cell_width // 2 - cell_width, cell_height))
+	with _TILE_CACHE_LOCK:
+		_TILE_CACHE[key] = tile
+		while len(_TILE_CACHE) > TILE_CACHE_ENTRIES:
+			_TILE_CACHE.popitem(last=False)
+	return tile
+
+def _tiled_pieces(text, font, runs, opacity, angle, spacing, origin, size):
+	"""
+	A tiled watermark for an image of the given size, as ((x, y), mask) pieces to paste.
 	
-	import platform
+	The full-image pattern is built from the tile by doubling pastes (each pass
+	copies everything so far) instead of one paste per repeat, then cut into
+	horizontal bands and trimmed to the inked stretches of each, so drawing only
+	touches pixels near the text rather than the whole image. Cached by image size
+	as well, so a run of same-sized images reuses it.
+	"""
+	key = (_font_identity(font), text, tuple(_font_identity(run_font) for _, run_font in runs or ()),
+		   opacity, angle, spacing, tuple(origin), tuple(size))
+	with _TILE_CACHE_LOCK:
+		pieces = _TILED_MASK_CACHE.get(key)
+		if pieces is not None:
+			_TILED_MASK_CACHE.move_to_end(key)
+			return pieces
+	tile = _tile_mask(text, font, runs, opacity, angle, spacing)
+	# Start one tile up and left of the image, at the phase set by the field position
+	shift_x = tile.width - int(origin[0]) % tile.width
+	shift_y = tile.height - int(origin[1]) % tile.height
+	width, height = size[0] + shift_x, size[1] + shift_y
+	pattern = Image.new("L", (width, height), 0)
+	pattern.paste(tile, (0, 0))
+	filled = tile.width
+	while filled < width:
+		pattern.paste(pattern.crop((0, 0, filled, tile.height)), (filled, 0))
+		filled *= 2
+	filled = tile.height
+	while filled < height:
+		pattern.paste(pattern.crop((0, 0, width, filled)), (0, filled))
+		filled *= 2
+	pattern = pattern.crop((shift_x, shift_y, shift_x + size[0], shift_y + size[1]))
 	
+	# One row per band, non-zero wherever any pixel in that column of the band is
+	band = TILED_BAND_HEIGHT
+	profile = pattern.point(lambda value: 255 if value else 0).reduce((1, band)).tobytes()
+	pieces = []
+	for row in range(0, len(profile) // size[0]):
+		top = row * band
+		bottom = min(size[1], top + band)
+		for run in _INKED_RUN.finditer(profile, row * size[0], (row + 1) * size[0]):
+			left, right = run.start() - row * size[0], run.end() - row * size[0]
+			pieces.append(((left, top), pattern.crop((left, top, right, bottom))))
+	with _TILE_CACHE_LOCK:
+		_TILED_MASK_CACHE[key] = pieces
+		while len(_TILED_MASK_CACHE) > TILED_MASK_CACHE_ENTRIES:
+			_TILED_MASK_CACHE.popitem(last=False)
+	return pieces
+
+def _draw_tiled(image: Image.Image, text, rgb, font, opacity=100, fallback_fonts=None, tiling=(30, 40), position=(0, 0)) -> Image.Image:
+	"""Repeat text diagonally over the whole image by pasting the cached pattern pieces."""
+	if image.mode not in ("RGB", "RGBA"):
+		image = image.convert("RGBA")
+	angle, spacing = tiling
+	runs = _text_runs(text, font, fallback_fonts)
+	fill = rgb if image.mode == "RGB" else (*rgb, 255)
+	for xy, piece in _tiled_pieces(text, font, runs, opacity, angle, spacing, position, image.size):
+		image.paste(fill, xy, piece)
+	return image
+
+def _thread_font_cache() -> "OrderedDict[tuple, ImageFont.FreeTypeFont]":
+	"""The calling thread's font cache, emptied if the cache was cleared since it was last used."""
+	local = _FONT_CACHE_LOCAL
+	if getattr(local, "generation", None) != _FONT_CACHE_GENERATION:
+		local.fonts = OrderedDict()
+		local.generation = _FONT_CACHE_GENERATION
+	return local.fonts
+
+def _get_cached_font(font_path, font_size, face_index=0):
+	"""Return a FreeType font for (path, size, face), parsing the file only on a cache miss in this thread."""
+	key = (os.path.abspath(font_path), font_size, face_index)
+	fonts = _thread_font_cache()
+	font = fonts.get(key)
+	if font is not None:
+		fonts.move_to_end(key)
+		with _FONT_CACHE_LOCK:
+			_FONT_CACHE_STATS["hits"] += 1
+		return font
+	font = ImageFont.truetype(font_path, font_size, index=face_index)
+	fonts[key] = font
+	evicted = 0
+	while len(fonts) > _FONT_CACHE_MAX:
+		fonts.popitem(last=False)
+		evicted += 1
+	with _FONT_CACHE_LOCK:
+		_FONT_CACHE_STATS["misses"] += 1
+		_FONT_CACHE_STATS["evictions"] += evicted
+	return font
+
+def get_font_cache_stats() -> dict:
+	"""
+	Return counters for the font cache.
+	
+	Returns:
+		dict: hits, misses and evictions across all threads, the calling thread's
+		current size, and max_size (per thread)
+	"""
+	with _FONT_CACHE_LOCK:
+		stats = dict(_FONT_CACHE_STATS)
+	stats["size"] = len(_thread_font_cache())
+	stats["max_size"] = _FONT_CACHE_MAX
+	return stats
+
+def set_font_cache_size(max_entries: int) -> None:
+	"""Change the maximum number of cached fonts per thread; larger caches shrink on their next miss."""
+	if not isinstance(max_entries, int) or max_entries <= 0:
+		raise ValueError("Font cache size must be a positive integer")
+	global _FONT_CACHE_MAX
+	_FONT_CACHE_MAX = max_entries
+	fonts = _thread_font_cache()
+	evicted = 0
+	while len(fonts) > max_entries:
+		fonts.popitem(last=False)
+		evicted += 1
+	with _FONT_CACHE_LOCK:
+		_FONT_CACHE_STATS["evictions"] += evicted
+
+def clear_font_cache() -> None:
+	"""Drop all cached fonts (in every thread) and reset the counters."""
+	global _FONT_CACHE_GENERATION
+	with _FONT_CACHE_LOCK:
+		_FONT_CACHE_GENERATION += 1
+		for key in _FONT_CACHE_STATS:
+			_FONT_CACHE_STATS[key] = 0
+
+# Special mappings for common Windows fonts
+_WINDOWS_FONT_MAP = {
+	"Times New Roman": ["times.ttf", "timesbd.ttf"],
+	"Arial": ["arial.ttf", "arialbd.ttf"],
+	"Courier New": ["cour.ttf", "courbd.ttf"],
+	"Comic Sans MS": ["comic.ttf", "comicbd.ttf"],
+	"Georgia": ["georgia.ttf", "georgiab.ttf"],
+	"Verdana": ["verdana.ttf", "verdanab.ttf"],
+	"Trebuchet MS": ["trebuc.ttf", "trebucbd.ttf"],
+	"Tahoma": ["tahoma.ttf", "tahomabd.ttf"],
+	"Impact": ["impact.ttf"]
+}
+
+def _system_font_dirs() -> list:
+	"""Root directories scanned (recursively) for system fonts on this platform."""
+	system = platform.system()
+	if system == "Windows":
+		dirs = [os.path.join(os.getenv("WINDIR") or "C:\\Windows", "Fonts")]
+		local_app_data = os.getenv("LOCALAPPDATA")
+		if local_app_data:
+			dirs.append(os.path.join(local_app_data, "Microsoft", "Windows", "Fonts"))
+		return dirs
+	if system == "Darwin":  # macOS
+		return ["/System/Library/Fonts", "/Library/Fonts", os.path.expanduser("~/Library/Fonts")]
+	# Linux
+	return [
+		"/usr/share/fonts",
+		"/usr/local/share/fonts",
+		os.path.expanduser("~/.local/share/fonts"),
+		os.path.expanduser("~/.fonts"),
+	]
+
+def _dir_mtime(path):
+	try:
+		return os.stat(path).st_mtime_ns
+	except OSError:
+		return None
+
+def _is_font_file(filename: str) -> bool:
+	return filename.lower().endswith((".ttf", ".otf", ".ttc"))
+
+def _scan_font_files(path: str) -> dict:
+	"""Map file names to paths for the font files directly inside a directory."""
+	files = {}
 	try:
-		# 1. Check if it's in config
-		if font_name in CONFIG.get("fonts", {}):
-			font_variants = CONFIG["fonts"][font_name]
-			font_path = next(iter(font_variants.values()))
-			return ImageFont.truetype(font_path, font_size)
+		with os.scandir(path) as entries:
+			for entry in entries:
+				if _is_font_file(entry.name) and entry.is_file():
+					files[entry.name] = entry.path
+	except OSError:
+		pass
+	return files
+
+def _write_json_atomic(path: str, data, indent=None) -> None:
+	"""Write JSON to a temp file next to `path` and rename it into place."""
+	directory = os.path.dirname(path)
+	if directory:
+		os.makedirs(directory, exist_ok=True)
+	tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+	try:
+		with open(tmp_path, "w") as f:
+			json.dump(data, f, indent=indent)
+		os.replace(tmp_path, path)
+	except BaseException:
+		try:
+			os.remove(tmp_path)
+		except OSError:
+			pass
+		raise
+
+def _read_font_faces(path: str) -> list:
+	"""Read family/style names of every face in a font file (collections have several)."""
+	faces = []
+	for face_index in range(64):
+		try:
+			font = ImageFont.truetype(path, 12, index=face_index)
+			family, style = font.getname()
+		except Exception:
+			break
+		faces.append({"index": face_index, "family": family or "", "style": style or ""})
+		if not path.lower().endswith(".ttc"):
+			break
+	return faces
+
+def _walk_font_dirs(roots, old_dirs: dict) -> dict:
+	"""
+	Recursively list font directories, reusing the cached listing of any
+	directory whose mtime is unchanged (its files and subdirectories are the same).
+	"""
+	dirs = {}
+	pending = list(roots)
+	while pending:
+		path = pending.pop()
+		if path in dirs:
+			continue
+		mtime = _dir_mtime(path)
+		if mtime is None:
+			continue
+		cached = old_dirs.get(path)
+		if cached and cached.get("mtime") == mtime:
+			entry = cached
+		else:
+			files, subdirs = [], []
+			try:
+				with os.scandir(path) as entries:
+					for item in entries:
+						try:
+							if item.is_dir():
+								subdirs.append(item.path)
+							elif _is_font_file(item.name):
+								files.append(item.name)
+						except OSError:
+							continue
+			except OSError:
+				continue
+			entry = {"mtime": mtime, "files": sorted(files), "subdirs": sorted(subdirs)}
+		dirs[path] = entry
+		pending.extend(entry["subdirs"])
+	return dirs
+
+def _load_font_catalog() -> dict:
+	global _FONT_CATALOG
+	if _FONT_CATALOG:
+		return _FONT_CATALOG
+	try:
+		with open(get_user_data_path(FONT_CATALOG_FILE), "r") as f:
+			catalog = json.load(f)
+		if catalog.get("version") == FONT_CATALOG_VERSION and catalog.get("roots") == _system_font_dirs():
+			_FONT_CATALOG = catalog
+	except Exception:
+		pass
+	return _FONT_CATALOG
+
+def refresh_font_catalog(force=False) -> dict:
+	"""
+	Bring the on-disk system font catalog up to date and return it.
+	
+	Only directories whose mtime changed are listed again, and only new or
+	modified font files are opened (in parallel) to read their family/style names.
+	
+	Args:
+		force: If True, ignore the cached catalog and rescan everything
+	
+	Returns:
+		dict: The catalog ({"dirs": {...}, "fonts": {path: {"mtime", "size", "faces"}}})
+	"""
+	global _FONT_CATALOG
+	with _FONT_INDEX_LOCK:
+		old = {} if force else _load_font_catalog()
+		old_dirs = old.get("dirs", {})
+		old_fonts = old.get("fonts", {})
+		roots = _system_font_dirs()
+		dirs = _walk_font_dirs(roots, old_dirs)
+		
+		fonts = {}
+		to_read = []
+		for dir_path, entry in dirs.items():
+			dir_unchanged = old_dirs.get(dir_path) is entry
+			for filename in entry["files"]:
+				path = os.path.join(dir_path, filename)
+				cached = old_fonts.get(path)
+				if cached is not None and dir_unchanged:
+					fonts[path] = cached
+					continue
+				try:
+					st = os.stat(path)
+				except OSError:
+					continue
+				if cached is not None and cached.get("mtime") == st.st_mtime_ns and cached.get("size") == st.st_size:
+					fonts[path] = cached
+				else:
+					to_read.append((path, st))
 		
-		# 2. Check user fonts directory (app data), then bundled fonts
-		for ext in ['.ttf', '.TTF', '.otf', '.OTF', '.ttc', '.TTC']:
-			user_fonts_dir = ensure_user_fonts_dir()
-			local_path = os.path.join(user_fonts_dir, f"{font_name}{ext}")
-			if os.path.exists(local_path):
-				return ImageFont.truetype(local_path, font_size)
-			bundled_path = get_resource_path(f"fonts/{font_name}{ext}")
-			if os.path.exists(bundled_path):
-				return ImageFont.truetype(bundled_path, font_size)
+		if to_read:
+			workers = min(16, (os.cpu_count() or 1) * 2)
+			with ThreadPoolExecutor(max_workers=workers) as pool:
+				paths = [path for path, _ in to_read]
+				for (path, st), faces in zip(to_read, pool.map(_read_font_faces, paths)):
+					fonts[path] = {"mtime": st.st_mtime_ns, "size": st.st_size, "faces": faces}
+			_debug(f"DEBUG: Font catalog read {len(to_read)} new or changed font files")
 		
-		# 3. Check if it's a system font (prefixed with [System])
+		catalog = {"version": FONT_CATALOG_VERSION, "roots": roots, "dirs": dirs, "fonts": fonts}
+		if to_read or dirs.keys() != old_dirs.keys() or fonts.keys() != old_fonts.keys() or any(
+			old_dirs[path] is not entry for path, entry in dirs.items()):
+			try:
+				_write_json_atomic(get_user_data_path(FONT_CATALOG_FILE), catalog)
+			except OSError as e:
+				print(f"Warning: Could not save font catalog: {e}")
+		_FONT_CATALOG = catalog
+		return catalog
+
+def _font_display_name(family: str, style: str) -> str:
+	if not style or style in ("Regular", "Book", "Normal", "Roman"):
+		return family
+	return f"{family} {style}"
+
+def _ensure_system_fonts() -> None:
+	"""Fill the "[System] " part of the font index from the (refreshed) font catalog."""
+	global _SYSTEM_FONTS_READY
+	if _SYSTEM_FONTS_READY:
+		return
+	catalog = refresh_font_catalog()
+	system_fonts = {}
+	system_files = {}
+	for path in sorted(catalog["fonts"]):
+		system_files.setdefault(os.path.basename(path).lower(), path)
+		for face in catalog["fonts"][path]["faces"]:
+			if not face["family"]:
+				continue
+			name = "[System] " + _font_display_name(face["family"], face["style"])
+			system_fonts.setdefault(name, (path, face["index"]))
+	_SYSTEM_FONTS.clear()
+	_SYSTEM_FONTS.update(system_fonts)
+	_SYSTEM_FONT_FILES.clear()
+	_SYSTEM_FONT_FILES.update(system_files)
+	_SYSTEM_FONTS_READY = True
+
+def _build_font_index() -> None:
+	"""Scan config, user and bundled font locations once into the name -> (path, face) index."""
+	global _FONT_INDEX_CHECKED_AT, _SYSTEM_FONTS_READY
+	index = {}
+	names = []
+	dir_mtimes = {}
+	
+	# 1. Fonts from config
+	for font_name, font_variants in CONFIG.get("fonts", {}).items():
+		if font_variants:
+			index[font_name] = (next(iter(font_variants.values())), 0)
+			names.append(font_name)
+	
+	# 2. User fonts directory (app data), then bundled fonts, keyed by file name without extension
+	for fonts_dir in (ensure_user_fonts_dir(), get_resource_path("fonts")):
+		dir_mtimes[fonts_dir] = _dir_mtime(fonts_dir)
+		files = _scan_font_files(fonts_dir)
+		for ext in FONT_EXTENSIONS:
+			for filename, path in sorted(files.items()):
+				font_name, file_ext = os.path.splitext(filename)
+				if file_ext == ext and font_name not in index:
+					index[font_name] = (path, 0)
+					names.append(font_name)
+	
+	# 3. System fonts come from the catalog; just watch the top-level directories here
+	for fonts_dir in _system_font_dirs():
+		dir_mtimes[fonts_dir] = _dir_mtime(fonts_dir)
+	_SYSTEM_FONTS_READY = False
+	
+	_FONT_INDEX.clear()
+	_FONT_INDEX.update(index)
+	_FONT_MISSES.clear()
+	_FONT_INDEX_NAMES[:] = names
+	_FONT_INDEX_DIRS.clear()
+	_FONT_INDEX_DIRS.update(dir_mtimes)
+	_FONT_INDEX_CHECKED_AT = time.monotonic()
+	_debug(f"DEBUG: Font index built with {len(index)} fonts")
+
+def _ensure_font_index() -> None:
+	"""Build the font index on first use and rebuild it when a font directory's mtime changed."""
+	global _FONT_INDEX_CHECKED_AT
+	if not _FONT_INDEX_DIRS:
+		_build_font_index()
+		return
+	now = time.monotonic()
+	if now - _FONT_INDEX_CHECKED_AT < FONT_INDEX_RECHECK_SECONDS:
+		return
+	_FONT_INDEX_CHECKED_AT = now
+	for fonts_dir, mtime in _FONT_INDEX_DIRS.items():
+		if _dir_mtime(fonts_dir) != mtime:
+			_build_font_index()
+			return
+
+def invalidate_font_index() -> None:
+	"""Force the font name index to be rebuilt on the next lookup (e.g. after adding fonts)."""
+	global _SYSTEM_FONTS_READY
+	with _FONT_INDEX_LOCK:
+		_FONT_INDEX.clear()
+		_FONT_MISSES.clear()
+		_FONT_INDEX_DIRS.clear()
+		_SYSTEM_FONTS_READY = False
+
+def _resolve_system_font(system_font_name):
+	"""Match a "[System] " font name against the catalog, then against common file names."""
+	_ensure_system_fonts()
+	found = _SYSTEM_FONTS.get(f"[System] {system_font_name}")
+	if found:
+		return found
+	system = platform.system()
+	if system == "Windows":
+		# Special mappings first, then the common file name variations
+		candidates = list(_WINDOWS_FONT_MAP.get(system_font_name, []))
+		candidates += [
+			f"{system_font_name.replace(' ', '')}.ttf",
+			f"{system_font_name}.ttf",
+			f"{system_font_name.lower().replace(' ', '')}.ttf",
+			"times.ttf",  # Times New Roman -> times.ttf
+			"timesbd.ttf",  # Times New Roman Bold
+			"arial.ttf",  # Arial
+			"cour.ttf",  # Courier New
+			"verdana.ttf",  # Verdana
+		]
+	else:
+		candidates = [f"{system_font_name}{ext}" for ext in (".ttf", ".ttc", ".otf")]
+	for filename in candidates:
+		path = _SYSTEM_FONT_FILES.get(filename.lower())
+		if path:
+			_debug(f"DEBUG: Resolved system font '{system_font_name}': {path}")
+			return (path, 0)
+	return None
+
+def _resolve_font(font_name):
+	"""Find the (font file, face index) for a font name from config, ./fonts/ directory, or system fonts"""
+	global _SYSTEM_FONTS_READY
+	with _FONT_INDEX_LOCK:
+		_ensure_font_index()
+		if font_name in _FONT_INDEX:
+			return _FONT_INDEX[font_name]
+		
+		# Recent misses aren't looked up again, so unknown names don't hit the filesystem on every
+		# draw; once they expire a system font gets a catalog refresh, in case it was just installed
+		now = time.monotonic()
+		missed_at = _FONT_MISSES.get(font_name)
+		if missed_at is not None:
+			if now - missed_at < FONT_MISS_RETRY_SECONDS:
+				return None
+			if font_name.startswith("[System] "):
+				_SYSTEM_FONTS_READY = False
+		
+		found = None
+		# Check if it's a system font (prefixed with [System])
 		if font_name.startswith("[System] "):
-			system_font_name = font_name.replace("[System] ", "")
-			system = platform.system()
-			
-			if system == "Windows":
-				# Windows fonts are in C:\Windows\Fonts
-				# Try common variations
-				font_variations = [
-					f"C:\\Windows\\Fonts\\{system_font_name.replace(' ', '')}.ttf",
-					f"C:\\Windows\\Fonts\\{system_font_name}.ttf",
-					f"C:\\Windows\\Fonts\\{system_font_name.lower().replace(' ', '')}.ttf",
-					f"C:\\Windows\\Fonts\\times.ttf",  # Times New Roman -> times.ttf
-					f"C:\\Windows\\Fonts\\timesbd.ttf",  # Times New Roman Bold
-					f"C:\\Windows\\Fonts\\arial.ttf",  # Arial
-					f"C:\\Windows\\Fonts\\cour.ttf",  # Courier New
-					f"C:\\Windows\\Fonts\\verdana.ttf",  # Verdana
-				]
-				
-				# Special mappings for common fonts
-				font_map = {
-					"Times New Roman": ["times.ttf", "timesbd.ttf"],
-					"Arial": ["arial.ttf", "arialbd.ttf"],
-					"Courier New": ["cour.ttf", "courbd.ttf"],
-					"Comic Sans MS": ["comic.ttf", "comicbd.ttf"],
-					"Georgia": ["georgia.ttf", "georgiab.ttf"],
-					"Verdana": ["verdana.ttf", "verdanab.ttf"],
-					"Trebuchet MS": ["trebuc.ttf", "trebucbd.ttf"],
-					"Tahoma": ["tahoma.ttf", "tahomabd.ttf"],
-					"Impact": ["impact.ttf"]
-				}
-				
-				if system_font_name in font_map:
-					for font_file in font_map[system_font_name]:
-						system_path = f"C:\\Windows\\Fonts\\{font_file}"
-						if os.path.exists(system_path):
-							_debug(f"DEBUG: Loading Windows font: {system_path}")
-							return ImageFont.truetype(system_path, font_size)
-				
-				# Try all variations
-				for path in font_variations:
-					if os.path.exists(path):
-						_debug(f"DEBUG: Loading Windows font: {path}")
-						return ImageFont.truetype(path, font_size)
-			elif system == "Darwin":  # macOS
-				# Try system fonts
-				for fonts_dir in ["/System/Library/Fonts", "/Library/Fonts"]:
-					system_path = f"{fonts_dir}/{system_font_name}.ttf"
-					if os.path.exists(system_path):
-						return ImageFont.truetype(system_path, font_size)
-					system_path = f"{fonts_dir}/{system_font_name}.ttc"
-					if os.path.exists(system_path):
-						return ImageFont.truetype(system_path, font_size)
+			found = _resolve_system_font(font_name.replace("[System] ", "", 1))
 		
-		# Fallback: if no extension match, try as-is (maybe full path)
-		if os.path.exists(font_name):
-			return ImageFont.truetype(font_name, font_size)
+		# Fallback: try as-is (maybe full path)
+		if found is None and os.path.exists(font_name):
+			found = (font_name, 0)
 		
+		if found is None:
+			_FONT_MISSES[font_name] = now
+		else:
+			_FONT_MISSES.pop(font_name, None)
+			_FONT_INDEX[font_name] = found
+		return found
+
+def _resolve_font_path(font_name):
+	"""Find the font file for a font name (see _resolve_font)."""
+	found = _resolve_font(font_name)
+	return found[0] if found else None
+
+def list_available_fonts() -> list:
+	"""
+	List selectable font names: config fonts, user/bundled fonts, then "[System] " fonts from the catalog.
+	
+	Returns:
+		list: Font names accepted by font_style arguments
+	"""
+	with _FONT_INDEX_LOCK:
+		_ensure_font_index()
+		_ensure_system_fonts()
+		return list(_FONT_INDEX_NAMES) + sorted(_SYSTEM_FONTS, key=str.lower)
+
+def _load_font(font_name, font_size=20):
+	"""Load font from config, ./fonts/ directory, or system fonts (cached by resolved path and size)"""
+	if font_name == "default" or not font_name:
+		return ImageFont.load_default()
+	
+	try:
+		found = _resolve_font(font_name)
+		if found:
+			return _get_cached_font(found[0], font_size, found[1])
 	except Exception as e:
 		print(f"Warning: Could not load font '{font_name}': {e}")
 	
 	# Final fallback
 	return ImageFont.load_default()
 
-def create_image_with_text(text, image_path, position: tuple =(), text_color=(0, 0, 0), font_size=20, font_style="default", output_path=None, opacity=100) -> Image.Image:
-	# Create a new image with the specified background color
-	image = Image.open(image_path).convert("RGB")
+def _merge_ranges(ranges) -> list:
+	merged = []
+	for start, end in sorted(ranges):
+		if merged and start <= merged[-1][1] + 1:
+			merged[-1][1] = max(merged[-1][1], end)
+		else:
+			merged.append([start, end])
+	return merged
+
+def _read_cmap_ranges(path: str, face_index=0) -> list:
+	"""Parse a font's cmap table into merged [start, end] codepoint ranges that map to real glyphs."""
+	with open(path, "rb") as f:
+		def read(offset, size):
+			f.seek(offset)
+			chunk = f.read(size)
+			if len(chunk) != size:
+				raise ValueError(f"Truncated font file: {path}")
+			return chunk
+		
+		face_offset = 0
+		if read(0, 4) == b"ttcf":
+			num_fonts = struct.unpack(">I", read(8, 4))[0]
+			if face_index >= num_fonts:
+				raise ValueError(f"Font collection has no face {face_index}: {path}")
+			face_offset = struct.unpack(">I", read(12 + 4 * face_index, 4))[0]
+		num_tables = struct.unpack(">H", read(face_offset + 4, 2))[0]
+		records = read(face_offset + 12, 16 * num_tables)
+		cmap = None
+		for i in range(num_tables):
+			tag, _, offset, length = struct.unpack(">4sIII", records[16 * i:16 * i + 16])
+			if tag == b"cmap":
+				cmap = read(offset, length)
+				break
+		if cmap is None:
+			return []
+	
+	# Pick the best Unicode subtable: full-repertoire format 12, then BMP format 4, then symbol
+	best = None
+	for i in range(struct.unpack(">H", cmap[2:4])[0]):
+		platform_id, encoding_id, offset = struct.unpack(">HHI", cmap[4 + 8 * i:12 + 8 * i])
+		fmt = struct.unpack(">H", cmap[offset:offset + 2])[0]
+		unicode_table = platform_id == 0 or (platform_id, encoding_id) in ((3, 1), (3, 10))
+		if fmt == 12 and unicode_table:
+			rank = 0
+		elif fmt == 4 and unicode_table:
+			rank = 1
+		elif fmt == 4 and (platform_id, encoding_id) == (3, 0):
+			rank = 2
+		else:
+			continue
+		if best is None or rank < best[0]:
+			best = (rank, fmt, offset)
+	if best is None:
+		return []
+	
+	_, fmt, offset = best
+	ranges = []
+	if fmt == 12:
+		num_groups = struct.unpack(">I", cmap[offset + 12:offset + 16])[0]
+		for i in range(num_groups):
+			start, end, glyph = struct.unpack(">III", cmap[offset + 16 + 12 * i:offset + 28 + 12 * i])
+			if glyph == 0:
+				start += 1  # first code point of the group maps to .notdef
+			if start <= end:
+				ranges.append((start, end))
+	else:
+		seg_x2 = struct.unpack(">H", cmap[offset + 6:offset + 8])[0]
+		ends_at = offset + 14
+		starts_at = ends_at + seg_x2 + 2
+		deltas_at = starts_at + seg_x2
+		range_offsets_at = deltas_at + seg_x2
+		for i in range(seg_x2 // 2):
+			end = struct.unpack(">H", cmap[ends_at + 2 * i:ends_at + 2 * i + 2])[0]
+			start = struct.unpack(">H", cmap[starts_at + 2 * i:starts_at + 2 * i + 2])[0]
+			delta = struct.unpack(">h", cmap[deltas_at + 2 * i:deltas_at + 2 * i + 2])[0]
+			range_offset = struct.unpack(">H", cmap[range_offsets_at + 2 * i:range_offsets_at + 2 * i + 2])[0]
+			if start == 0xFFFF or start > end:
+				continue
+			if range_offset == 0:
+				# glyph = (c + delta) & 0xFFFF, which is .notdef for exactly one code point
+				notdef = (-delta) & 0xFFFF
+				if start <= notdef <= end:
+					if start < notdef:
+						ranges.append((start, notdef - 1))
+					if notdef < end:
+						ranges.append((notdef + 1, end))
+				else:
+					ranges.append((start, end))
+				continue
+			glyphs_at = range_offsets_at + 2 * i + range_offset
+			for code in range(start, end + 1):
+				at = glyphs_at + 2 * (code - start)
+				if at + 2 > len(cmap):
+					break
+				glyph = struct.unpack(">H", cmap[at:at + 2])[0]
+				if glyph and (glyph + delta) & 0xFFFF:
+					ranges.append((code, code))
+	return _merge_ranges(ranges)
+
+def _load_glyph_coverage_file() -> dict:
+	global _GLYPH_COVERAGE_DISK
+	if _GLYPH_COVERAGE_DISK is None:
+		_GLYPH_COVERAGE_DISK = {}
+		try:
+			with open(get_user_data_path(GLYPH_COVERAGE_FILE), "r") as f:
+				data = json.load(f)
+			if data.get("version") == GLYPH_COVERAGE_VERSION:
+				_GLYPH_COVERAGE_DISK = data.get("fonts", {})
+		except Exception:
+			pass
+	return _GLYPH_COVERAGE_DISK
+
+def _glyph_coverage(font):
+	"""
+	Return the (starts, ends) code point ranges covered by a loaded font, or an
+	empty tuple if unknown (e.g. Pillow's built-in font), which is treated as covering everything.
+	"""
+	path = getattr(font, "path", None)
+	if not isinstance(path, str):
+		return None
+	key = f"{os.path.abspath(path)}|{getattr(font, 'index', 0)}"
+	coverage = _GLYPH_COVERAGE.get(key)
+	if coverage is not None:
+		return coverage
+	with _GLYPH_COVERAGE_LOCK:
+		coverage = _GLYPH_COVERAGE.get(key)
+		if coverage is not None:
+			return coverage
+		try:
+			st = os.stat(path)
+			stored = _load_glyph_coverage_file()
+			entry = stored.get(key)
+			if not entry or entry.get("mtime") != st.st_mtime_ns or entry.get("size") != st.st_size:
+				entry = {"mtime": st.st_mtime_ns, "size": st.st_size,
+						 "ranges": _read_cmap_ranges(path, getattr(font, "index", 0))}
+				stored[key] = entry
+				try:
+					_write_json_atomic(get_user_data_path(GLYPH_COVERAGE_FILE),
+									   {"version": GLYPH_COVERAGE_VERSION, "fonts": stored})
+				except OSError as e:
+					print(f"Warning: Could not save glyph coverage index: {e}")
+			ranges = entry["ranges"]
+			coverage = ([r[0] for r in ranges], [r[1] for r in ranges]) if ranges else None
+		except Exception as e:
+			_debug(f"DEBUG: Could not read glyph coverage for '{path}': {e}")
+			coverage = None
+		# Unknown coverage is cached as an empty tuple so the file is not parsed again
+		_GLYPH_COVERAGE[key] = coverage if coverage is not None else ()
+		return _GLYPH_COVERAGE[key]
+
+def _font_has_glyph(coverage, char) -> bool:
+	if not coverage:
+		return True
+	code = ord(char)
+	starts, ends = coverage
+	i = bisect.bisect_right(starts, code) - 1
+	return i >= 0 and code <= ends[i]
+
+def _load_fallback_fonts(font_names, font_size) -> list:
+	"""Load the fonts of a fallback chain, skipping names that can't be resolved."""
+	fonts = []
+	for font_name in list(font_names or []) + list(CONFIG.get("font_fallbacks", [])):
+		if not font_name or font_name == "default":
+			continue
+		try:
+			found = _resolve_font(font_name)
+			if found:
+				font = _get_cached_font(found[0], font_size, found[1])
+				if font not in fonts:
+					fonts.append(font)
+		except Exception as e:
+			print(f"Warning: Could not load fallback font '{font_name}': {e}")
+	return fonts
+
+def _split_font_runs(text, fonts) -> list:
+	"""
+	Split text into (run, font) pieces, using for each character the first font
+	in the chain that has a glyph for it. A run keeps its font while that font
+	covers the next character, so clusters and spaces are not split needlessly.
+	"""
+	coverages = [_glyph_coverage(font) for font in fonts]
+	runs = []
+	current = None
+	for char in text:
+		if current is not None and _font_has_glyph(coverages[current], char):
+			choice = current
+		else:
+			choice = 0
+			for i, coverage in enumerate(coverages):
+				if _font_has_glyph(coverage, char):
+					choice = i
+					break
+		if runs and choice == current:
+			runs[-1][0] += char
+		else:
+			runs.append([char, choice])
+			current = choice
+	return [(run, fonts[i]) for run, i in runs]
+
+def find_missing_glyphs(text, font_style="default", font_fallbacks=None) -> set:
+	"""
+	Report characters that no font in a field's chain can draw (they would render as boxes).
+	
+	Args:
+		text: Text to check
+		font_style: Primary font name
+		font_fallbacks: Optional list of fallback font names (config "font_fallbacks" are appended)
+	
+	Returns:
+		set: Characters not covered by any font in the chain
+	"""
+	fonts = [_load_font(font_style)] + _load_fallback_fonts(font_fallbacks, 20)
+	coverages = [_glyph_coverage(font) for font in fonts]
+	missing = set()
+	for char in set(text):
+		if not char.isspace() and not any(_font_has_glyph(coverage, char) for coverage in coverages):
+			missing.add(char)
+	return missing
+
+def _image_nbytes(image: Image.Image) -> int:
+	# Pillow keeps RGB pixels in 4-byte slots
+	return image.width * image.height * 4
+
+def _evict_images() -> None:
+	"""Drop least recently used images until the cache fits its budget (call with the lock held)."""
+	global _IMAGE_CACHE_BYTES
+	while _IMAGE_CACHE_BYTES > _IMAGE_CACHE_BUDGET and _IMAGE_CACHE:
+		_, (_, old_image) = _IMAGE_CACHE.popitem(last=False)
+		_IMAGE_CACHE_BYTES -= _image_nbytes(old_image)
+		_IMAGE_CACHE_STATS["evictions"] += 1
+
+def _open_base_image(image_path) -> Image.Image:
+	"""
+	Return a private RGB copy of an image file, decoding it only if it isn't cached.
+	
+	The cached pixels are never handed out, so callers are free to draw on the
+	result. An entry is reused while the file's mtime and size are unchanged.
+	File objects and in-memory buffers are decoded directly, without caching.
+	"""
+	global _IMAGE_CACHE_BYTES
+	if not isinstance(image_path, (str, os.PathLike)):
+		return Image.open(image_path).convert("RGB")
+	path = os.path.abspath(os.fspath(image_path))
+	stat = os.stat(path)
+	version = (stat.st_mtime_ns, stat.st_size)
+	with _IMAGE_CACHE_LOCK:
+		entry = _IMAGE_CACHE.get(path)
+		if entry is not None and entry[0] == version:
+			_IMAGE_CACHE.move_to_end(path)
+			_IMAGE_CACHE_STATS["hits"] += 1
+			return entry[1].copy()
+		_IMAGE_CACHE_STATS["misses"] += 1
+	with Image.open(path) as source:
+		image = source.convert("RGB")
+	nbytes = _image_nbytes(image)
+	if nbytes > _IMAGE_CACHE_BUDGET:
+		return image
+	with _IMAGE_CACHE_LOCK:
+		old = _IMAGE_CACHE.pop(path, None)
+		if old is not None:
+			_IMAGE_CACHE_BYTES -= _image_nbytes(old[1])
+		_IMAGE_CACHE[path] = (version, image)
+		_IMAGE_CACHE_BYTES += nbytes
+		_evict_images()
+	return image.copy()
+
+def get_image_cache_stats() -> dict:
+	"""Return hit/miss/eviction counters and current size of the decoded-image cache."""
+	with _IMAGE_CACHE_LOCK:
+		stats = dict(_IMAGE_CACHE_STATS)
+		stats["entries"] = len(_IMAGE_CACHE)
+		stats["bytes"] = _IMAGE_CACHE_BYTES
+		stats["budget"] = _IMAGE_CACHE_BUDGET
+	return stats
+
+def set_image_cache_budget(max_bytes: int) -> None:
+	"""Change the decoded-image cache budget in bytes (0 disables it), evicting images as needed."""
+	global _IMAGE_CACHE_BUDGET
+	with _IMAGE_CACHE_LOCK:
+		_IMAGE_CACHE_BUDGET = max(0, int(max_bytes))
+		_evict_images()
+
+def clear_image_cache() -> None:
+	"""Drop every cached base image and reset the counters."""
+	global _IMAGE_CACHE_BYTES
+	with _IMAGE_CACHE_LOCK:
+		_IMAGE_CACHE.clear()
+		_IMAGE_CACHE_BYTES = 0
+		for key in _IMAGE_CACHE_STATS:
+			_IMAGE_CACHE_STATS[key] = 0
+
+def _image_format(path, image_format=None) -> str:
+	"""Pillow format name for an output path (from its extension unless given)."""
+	if image_format:
+		return image_format
+	ext = os.path.splitext(path)[1].lower()
+	image_format = Image.registered_extensions().get(ext)
+	if image_format is None:
+		raise ValueError(f"Unknown image file extension: {ext or path!r}")
+	return image_format
+
+def _encode_image(image: Image.Image, image_format, **params) -> bytes:
+	"""Encode an image in memory and return the file's bytes."""
+	buffer = io.BytesIO()
+	image.save(buffer, format=image_format, **params)
+	return buffer.getvalue()
+
+def _write_image_temp(image: Image.Image, path, image_format=None, fsync=False, **params):
+	"""Encode an image to a temp file next to `path`; returns (tmp_path, bytes written)."""
+	image_format = _image_format(path, image_format)
+	tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+	try:
+		with open(tmp_path, "wb") as f:
+			image.save(f, format=image_format, **params)
+			nbytes = f.tell()
+			if fsync:
+				f.flush()
+				os.fsync(f.fileno())
+	except BaseException:
+		try:
+			os.remove(tmp_path)
+		except OSError:
+			pass
+		raise
+	return tmp_path, nbytes
+
+def _save_image_atomic(image: Image.Image, path, image_format=None, fsync=False, times_ns=None, **params) -> int:
+	"""
+	Save an image via a temp file and a rename, so readers never see a partial file.
+	
+	Args:
+		image: Image to save
+		path: Destination; the format comes from its extension unless image_format is given
+		fsync: Flush the file to disk before it is renamed into place
+		times_ns: Optional (atime_ns, mtime_ns) to give the file
+		**params: Passed on to Image.save (quality, optimize, ...)
+	
+	Returns:
+		int: Size of the written file in bytes
+	"""
+	tmp_path, nbytes = _write_image_temp(image, path, image_format, fsync, **params)
+	try:
+		if times_ns is not None:
+			os.utime(tmp_path, ns=times_ns)
+		os.replace(tmp_path, path)
+	except BaseException:
+		try:
+			os.remove(tmp_path)
+		except OSError:
+			pass
+		raise
+	return nbytes
+
+def get_encoder_profiles() -> dict:
+	"""Return the encoder profiles (built-in ones plus those from config.json), by name."""
+	profiles = dict(ENCODER_PROFILES)
+	profiles.update(CONFIG.get("encoder_profiles") or {})
+	return profiles
+
+def list_encoder_profiles() -> list:
+	"""Return the names of the available encoder profiles, "default" (Pillow's own settings) first."""
+	return ["default"] + sorted(name for name in get_encoder_profiles() if name != "default")
+
+def resolve_encoder_profile(profile, path):
+	"""
+	Work out how to save an image under an encoder profile.
+	
+	Args:
+		profile: Profile name (None means "default")
+		path: Requested output path; its extension picks the format, unless the
+			profile converts to another one, in which case the extension is swapped
+	
+	Returns:
+		tuple: (output_path, format, Image.save keyword arguments)
+	"""
+	settings = get_encoder_profiles().get(profile or "default")
+	if settings is None:
+		raise ValueError(f"Unknown encoder profile: {profile!r} (available: {', '.join(list_encoder_profiles())})")
+	path = os.fspath(path)
+	image_format = settings.get("format")
+	if image_format:
+		image_format = image_format.upper()
+		root, ext = os.path.splitext(path)
+		if Image.registered_extensions().get(ext.lower()) != image_format:
+			path = root + _FORMAT_EXTENSIONS.get(image_format, f".{image_format.lower()}")
+	else:
+		image_format = _image_format(path)
+	return path, image_format, dict(settings.get(image_format) or {})
+
+def _fsync_dir(path) -> None:
+	"""Make renames inside a directory durable (a no-op where directories can't be opened, e.g. Windows)."""
+	try:
+		fd = os.open(path or ".", os.O_RDONLY)
+	except OSError:
+		return
+	try:
+		os.fsync(fd)
+	except OSError:
+		pass
+	finally:
+		os.close(fd)
+
+class OutputWriter:
+	"""
+	Encode and save images on background threads while the caller keeps rendering.
+	
+	submit() hands an image over and returns a Future for its final path. At most
+	`max_pending` images are queued or being encoded at a time; submit() blocks
+	beyond that, so a fast renderer can't pile up decoded images in memory. Every
+	file is written to a temp name and renamed into place. With fsync_batch=N,
+	files are flushed to disk N at a time and only then renamed, followed by one
+	fsync per directory, instead of a full sync for every file.
+	
+	Use it as a context manager (or call close()) so queued writes finish.
+	"""
+	
+	def __init__(self, workers=None, max_pending=None, fsync_batch=0):
+		self.workers = max(1, workers or min(4, os.cpu_count() or 1))
+		self.fsync_batch = max(0, int(fsync_batch or 0))
+		self._executor = ThreadPoolExecutor(max_workers=self.workers)
+		self._slots = threading.Semaphore(max(1, max_pending or self.workers * 2))
+		self._lock = threading.Lock()
+		self._tasks = set()
+		self._unsynced = []
+		self.stats = {"files": 0, "bytes": 0, "encode_seconds": 0.0, "wait_seconds": 0.0, "syncs": 0}
+	
+	def __enter__(self):
+		return self
+	
+	def __exit__(self, exc_type, exc, tb):
+		self.close()
+	
+	def submit(self, image: Image.Image, path, image_format=None, **params) -> Future:
+		"""
+		Queue an image to be saved at `path`; waits while the queue is full.
+		
+		The writer keeps a reference to the image until it is encoded, so don't
+		draw on it afterwards. Extra keyword arguments go to Image.save.
+		"""
+		return self._enqueue(self._write, image, os.fspath(path), image_format, params)
+	
+	def encode(self, image: Image.Image, image_format, **params) -> Future:
+		"""Queue an image to be encoded in memory; the Future gives its bytes (e.g. for an ArchiveSink)."""
+		return self._enqueue(self._encode, image, image_format, params)
+	
+	def _enqueue(self, work, *args) -> Future:
+		started = time.perf_counter()
+		self._slots.acquire()
+		waited = time.perf_counter() - started
+		result = Future()
+		try:
+			task = self._executor.submit(work, *args, result)
+		except BaseException:
+			self._slots.release()
+			raise
+		with self._lock:
+			self.stats["wait_seconds"] += waited
+			self._tasks.add(task)
+		task.add_done_callback(self._task_done)
+		return result
+	
+	def _task_done(self, task) -> None:
+		with self._lock:
+			self._tasks.discard(task)
+	
+	def _write(self, image, path, image_format, params, result) -> None:
+		try:
+			started = time.perf_counter()
+			try:
+				tmp_path, nbytes = _write_image_temp(image, path, image_format, **params)
+			finally:
+				del image
+				self._slots.release()
+			elapsed = time.perf_counter() - started
+			batch = None
+			with self._lock:
+				self.stats["files"] += 1
+				self.stats["bytes"] += nbytes
+				self.stats["encode_seconds"] += elapsed
+				if self.fsync_batch:
+					self._unsynced.append((tmp_path, path, result))
+					if len(self._unsynced) >= self.fsync_batch:
+						batch, self._unsynced = self._unsynced, []
+			if not self.fsync_batch:
+				os.replace(tmp_path, path)
+				result.set_result(path)
+			elif batch:
+				self._sync(batch)
+		except BaseException as e:
+			result.set_exception(e)
+	
+	def _encode(self, image, image_format, params, result) -> None:
+		try:
+			started = time.perf_counter()
+			try:
+				data = _encode_image(image, image_format, **params)
+			finally:
+				del image
+				self._slots.release()
+			with self._lock:
+				self.stats["files"] += 1
+				self.stats["bytes"] += len(data)
+				self.stats["encode_seconds"] += time.perf_counter() - started
+			result.set_result(data)
+		except BaseException as e:
+			result.set_exception(e)
+	
+	def _sync(self, batch) -> None:
+		"""Flush a batch of written temp files to disk, rename them into place, then sync their directories."""
+		directories = set()
+		for tmp_path, path, result in batch:
+			try:
+				# Opened for writing: on Windows, fsync (FlushFileBuffers) needs write access
+				with open(tmp_path, "r+b") as f:
+					os.fsync(f.fileno())
+				os.replace(tmp_path, path)
+				directories.add(os.path.dirname(path))
+			except OSError as e:
+				result.set_exception(e)
+		for directory in directories:
+			_fsync_dir(directory)
+		with self._lock:
+			self.stats["syncs"] += 1
+		for _, path, result in batch:
+			if not result.done():
+				result.set_result(path)
+	
+	def flush(self) -> None:
+		"""Wait for every queued image to be written and renamed into place."""
+		while True:
+			with self._lock:
+				tasks = list(self._tasks)
+			if not tasks:
+				break
+			wait(tasks)
+		with self._lock:
+			batch, self._unsynced = self._unsynced, []
+		if batch:
+			self._sync(batch)
+	
+	def close(self) -> None:
+		"""Finish all pending writes and stop the encoder threads."""
+		self.flush()
+		self._executor.shutdown(wait=True)
+
+class ArchiveSink:
+	"""
+	Write encoded images one after another into a single ZIP or TAR file.
+	
+	Entries are appended strictly sequentially and nothing per entry is kept in
+	memory: the ZIP central directory is spooled to a temp file and copied to the
+	end on close() (ZIP64 records are added past 65535 entries or 4 GiB). Formats
+	that are already compressed (PNG, JPEG, WebP, ...) are stored as-is in a ZIP,
+	others are deflated. Beside the archive, `<archive>.index.jsonl` lists every
+	entry with the byte offset and size of its data, so read_archive_entry() can
+	pull one output back out without scanning the archive.
+	
+	The archive and index are written under temp names and renamed into place by
+	close(), so an interrupted batch never leaves a truncated archive behind.
+	"""
+	
+	def __init__(self, path, kind=None):
+		self.path = os.fspath(path)
+		if kind is None:
+			lower = self.path.lower()
+			kind = "zip" if lower.endswith(".zip") else "tar" if lower.endswith(".tar") else None
+		if kind not in ("zip", "tar"):
+			raise ValueError(f"Archive must be a .zip or .tar file (got {self.path!r})")
+		self.kind = kind
+		self.index_path = self.path + ARCHIVE_INDEX_SUFFIX
+		directory = os.path.dirname(self.path)
+		if directory:
+			os.makedirs(directory, exist_ok=True)
+		suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+		self._tmp_path = self.path + suffix
+		self._tmp_index_path = self.index_path + suffix
+		self._file = open(self._tmp_path, "wb")
+		self._index = open(self._tmp_index_path, "w", encoding="utf-8")
+		self._central = tempfile.TemporaryFile() if kind == "zip" else None
+		self._offset = 0
+		self.count = 0
+		now = time.localtime()
+		self._mtime = int(time.mktime(now))
+		self._dos_time = (now.tm_hour << 11) | (now.tm_min << 5) | (now.tm_sec // 2)
+		self._dos_date = (max(0, now.tm_year - 1980) << 9) | (now.tm_mon << 5) | now.tm_mday
+		self._closed = False
+	
+	def __enter__(self):
+		return self
+	
+	def __exit__(self, exc_type, exc, tb):
+		if exc_type is None:
+			self.close()
+		else:
+			self.abort()
+	
+	def add(self, name, data: bytes) -> None:
+		"""Append one file (name uses "/" separators) with the given contents."""
+		name = name.replace(os.sep, "/").lstrip("/")
+		if self.kind == "zip":
+			entry = self._add_zip(name, data)
+		else:
+			entry = self._add_tar(name, data)
+		self._index.write(json.dumps(entry, ensure_ascii=False) + "\n")
+		self.count += 1
+	
+	def _add_zip(self, name, data):
+		encoded_name = name.encode("utf-8")
+		image_format = Image.registered_extensions().get(os.path.splitext(name)[1].lower())
+		crc = zlib.crc32(data)
+		size = len(data)
+		if image_format in ARCHIVE_STORED_FORMATS:
+			method, stored = 0, data
+		else:
+			compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+			method, stored = 8, compressor.compress(data) + compressor.flush()
+		if size >= 0xFFFFFFFF or len(stored) >= 0xFFFFFFFF:
+			raise ValueError(f"Archive entry too large for a ZIP: {name}")
+		header_offset = self._offset
+		# Local header: UTF-8 names (flag 0x800); sizes are known, so no data descriptor
+		header = struct.pack("<IHHHHHIIIHH", 0x04034B50, 20, 0x800, method, self._dos_time, self._dos_date,
+							 crc, len(stored), size, len(encoded_name), 0)
+		self._write(header + encoded_name)
+		data_offset = self._offset
+		self._write(stored)
+		extra = b""
+		offset_field = header_offset
+		if header_offset >= 0xFFFFFFFF:
+			extra = struct.pack("<HHQ", 0x0001, 8, header_offset)
+			offset_field = 0xFFFFFFFF
+		self._central.write(struct.pack("<IHHHHHHIIIHHHHHII", 0x02014B50, 45 | (3 << 8), 45 if extra else 20, 0x800,
+										method, self._dos_time, self._dos_date, crc, len(stored), size,
+										len(encoded_name), len(extra), 0, 0, 0, 0o100644 << 16, offset_field))
+		self._central.write(encoded_name + extra)
+		return {"name": name, "offset": data_offset, "size": len(stored), "original_size": size,
+				"compression": "deflate" if method else "stored", "crc32": crc}
+	
+	def _add_tar(self, name, data):
+		info = tarfile.TarInfo(name)
+		info.size = len(data)
+		info.mtime = self._mtime
+		info.mode = 0o644
+		self._write(info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape"))
+		data_offset = self._offset
+		self._write(data)
+		remainder = len(data) % tarfile.BLOCKSIZE
+		if remainder:
+			self._write(b"\0" * (tarfile.BLOCKSIZE - remainder))
+		return {"name": name, "offset": data_offset, "size": len(data), "original_size": len(data),
+				"compression": "stored", "crc32": zlib.crc32(data)}
+	
+	def _write(self, data: bytes) -> None:
+		self._file.write(data)
+		self._offset += len(data)
+	
+	def _finish_zip(self) -> None:
+		central_offset = self._offset
+		self._central.seek(0)
+		shutil.copyfileobj(self._central, self._file)
+		central_size = self._central.tell()
+		self._offset += central_size
+		self._central.close()
+		count = self.count
+		if count >= 0xFFFF or central_offset >= 0xFFFFFFFF or central_size >= 0xFFFFFFFF:
+			zip64_offset = self._offset
+			self._write(struct.pack("<IQHHIIQQQQ", 0x06064B50, 44, 45, 45, 0, 0, count, count, central_size, central_offset))
+			self._write(struct.pack("<IIQI", 0x07064B50, 0, zip64_offset, 1))
+		self._write(struct.pack("<IHHHHIIH", 0x06054B50, 0, 0, min(count, 0xFFFF), min(count, 0xFFFF),
+								min(central_size, 0xFFFFFFFF), min(central_offset, 0xFFFFFFFF), 0))
+	
+	def _finish_tar(self) -> None:
+		# End-of-archive marker, padded to a whole record like tarfile does
+		self._write(b"\0" * (tarfile.BLOCKSIZE * 2))
+		remainder = self._offset % tarfile.RECORDSIZE
+		if remainder:
+			self._write(b"\0" * (tarfile.RECORDSIZE - remainder))
+	
+	def close(self) -> None:
+		"""Write the archive's trailer and move the archive and its index into place."""
+		if self._closed:
+			return
+		self._closed = True
+		if self.kind == "zip":
+			self._finish_zip()
+		else:
+			self._finish_tar()
+		self._file.close()
+		self._index.close()
+		os.replace(self._tmp_path, self.path)
+		os.replace(self._tmp_index_path, self.index_path)
+	
+	def abort(self) -> None:
+		"""Discard a partly written archive."""
+		if self._closed:
+			return
+		self._closed = True
+		for handle in (self._file, self._index, self._central):
+			if handle is not None:
+				handle.close()
+		for path in (self._tmp_path, self._tmp_index_path):
+			try:
+				os.remove(path)
+			except OSError:
+				pass
+
+def iter_archive_index(archive_path):
+	"""Yield the index entries (name, offset, size, ...) written beside an ArchiveSink archive."""
+	with open(os.fspath(archive_path) + ARCHIVE_INDEX_SUFFIX, "r", encoding="utf-8") as f:
+		for line in f:
+			if line.strip():
+				yield json.loads(line)
+
+def read_archive_entry(archive_path, name) -> bytes:
+	"""
+	Return the contents of one file from an ArchiveSink archive, using its index.
+	
+	Args:
+		archive_path: The .zip or .tar file
+		name: Entry name, as yielded by render_batch(archive=...)
+	
+	Returns:
+		bytes: The file's contents
+	"""
+	for entry in iter_archive_index(archive_path):
+		if entry["name"] == name:
+			break
+	else:
+		raise KeyError(f"No entry named {name!r} in {archive_path}")
+	with open(archive_path, "rb") as f:
+		f.seek(entry["offset"])
+		data = f.read(entry["size"])
+	if entry["compression"] == "deflate":
+		data = zlib.decompress(data, -15)
+	if zlib.crc32(data) != entry["crc32"]:
+		raise ValueError(f"Archive entry {name!r} is corrupt (CRC mismatch)")
+	return data
+
+def create_image_with_text(text, image_path, position: tuple =(), text_color=(0, 0, 0), font_size=20, font_style="default", output_path=None, opacity=100, font_fallbacks=None, writer=None, encoder_profile=None) -> Image.Image:
+	# Start from a private copy of the (cached) decoded image
+	image = _open_base_image(image_path)
 	
 	# Load a font
 	font = _load_font(font_style, font_size)
@@ -211,23 +1873,27 @@ def create_image_with_text(text, image_path, position: tuple =(), text_color=(0,
 	
 	# Single position mode
 	# Draw the text onto the image
-	image = _draw_text(image, position, text, text_color, font, opacity=opacity)
+	fallback_fonts = _load_fallback_fonts(font_fallbacks, font_size)
+	image = _draw_text(image, position, text, text_color, font, opacity=opacity, fallback_fonts=fallback_fonts)
 	# image.show()
 	
 	# Use custom output path if provided, otherwise use default
 	if output_path is None:
-		basename = os.path.basename(image_path)
-		name, ext = os.path.splitext(basename)
-		outputs_dir = ensure_user_dir("outputs")
-		output_path = os.path.join(outputs_dir, f"{name}_edited{ext}")
+		output_path = _default_output_path(image_path, {"text": text}, encoder_profile)
 	else:
 		# Ensure directory exists for custom output path
 		output_dir = os.path.dirname(output_path)
 		if output_dir:  # Only create if there's a directory component
 			os.makedirs(output_dir, exist_ok=True)
 	
-	image.convert("RGB").save(output_path)
-	print(f"Image saved to {output_path}")
+	output_path, image_format, save_params = resolve_encoder_profile(encoder_profile, output_path)
+	if writer is not None:
+		# Encoding and the write happen on the writer's threads; this copy is theirs
+		writer.submit(image.convert("RGB"), output_path, image_format, **save_params)
+		_debug(f"DEBUG: Image queued for {output_path}")
+	else:
+		_save_image_atomic(image.convert("RGB"), output_path, image_format, **save_params)
+		print(f"Image saved to {output_path}")
 
 	return image
 
@@ -348,14 +2014,374 @@ def make_coordinates_template(image_path, template_name, max_width=1280, max_hei
 		print("Template creation cancelled.")
 		return
 
-	# Save as JSON
-	templates_dir = ensure_user_dir("coord_templates")
-	template_path = os.path.join(templates_dir, f"{template_name}.json")
-	with open(template_path, "w") as f:
-		json.dump(points, f, indent=4)
-	print(f"Template saved as {template_name}.json")
+	# Save as JSON
+	templates_dir = ensure_user_dir("coord_templates")
+	template_path = os.path.join(templates_dir, f"{template_name}.json")
+	with open(template_path, "w") as f:
+		json.dump(points, f, indent=4)
+	_forget_template(template_name)
+	get_template_store().refresh(template_name, image_size=(original_width, original_height))
+	print(f"Template saved as {template_name}.json")
+
+def _freeze(value):
+	"""Return a read-only copy of parsed JSON (dicts become mapping proxies, lists tuples)."""
+	if isinstance(value, dict):
+		return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+	if isinstance(value, list):
+		return tuple(_freeze(item) for item in value)
+	return value
+
+def _thaw(value):
+	"""Return a mutable deep copy of a value returned by load_template."""
+	if isinstance(value, Mapping):
+		return {key: _thaw(item) for key, item in value.items()}
+	if isinstance(value, tuple):
+		return [_thaw(item) for item in value]
+	return value
+
+def load_template(template_name) -> Mapping:
+	"""
+	Load a coordinate template, parsing the JSON only when the file changed.
+	
+	Parsed templates are cached by path and revalidated with (mtime, size) on
+	every call. The result is shared, so it is returned as a read-only view;
+	use dict() / _thaw() on it to get a copy to modify.
+	
+	Args:
+		template_name: Name of the template (without .json extension)
+	
+	Returns:
+		Mapping: Read-only mapping of point names to point settings
+	"""
+	template_path = get_user_data_path("coord_templates", f"{template_name}.json")
+	try:
+		st = os.stat(template_path)
+	except FileNotFoundError:
+		raise FileNotFoundError(f"Template not found: {template_path}")
+	
+	with _TEMPLATE_CACHE_LOCK:
+		cached = _TEMPLATE_CACHE.get(template_path)
+	if cached is not None and cached[0] == (st.st_mtime_ns, st.st_size):
+		return cached[1]
+	
+	with open(template_path, "r") as f:
+		coords = _freeze(json.load(f))
+	with _TEMPLATE_CACHE_LOCK:
+		_TEMPLATE_CACHE[template_path] = ((st.st_mtime_ns, st.st_size), coords)
+	return coords
+
+def template_fields(coords):
+	"""
+	Yield (point_name, point_data) for the fields of a loaded template.
+	
+	Besides its fields (always objects) a template may hold template-wide
+	settings as plain values, e.g. "encoder_profile": "web"; those are skipped.
+	"""
+	for point_name, point_data in coords.items():
+		if isinstance(point_data, Mapping):
+			yield point_name, point_data
+
+def field_tiling(point_data, font_size, overrides=None):
+	"""
+	Return (angle, spacing) for a template field with "field_type": "tiled", or None.
+	
+	Args:
+		point_data: The field's settings from the template
+		font_size: The field's resolved font size (the default spacing is twice that)
+		overrides: Optional settings that win over point_data
+	"""
+	overrides = overrides or {}
+	if overrides.get("field_type", point_data.get("field_type", "text")) != "tiled":
+		return None
+	return (float(overrides.get("tile_angle", point_data.get("tile_angle", 30))),
+			max(0, int(overrides.get("tile_spacing", point_data.get("tile_spacing", font_size * 2)))))
+
+def template_encoder_profile(template_name):
+	"""Return the encoder profile saved with a template, or None."""
+	profile = load_template(template_name).get("encoder_profile")
+	return profile if isinstance(profile, str) else None
+
+def set_template_encoder_profile(template_name, profile) -> None:
+	"""Save (or with None, remove) the encoder profile used by default for a template's outputs."""
+	if profile is not None:
+		resolve_encoder_profile(profile, "check.png")
+	template_path = get_user_data_path("coord_templates", f"{template_name}.json")
+	coords = _thaw(load_template(template_name))
+	if profile is None:
+		coords.pop("encoder_profile", None)
+	else:
+		coords["encoder_profile"] = profile
+	_write_json_atomic(template_path, coords, indent=4)
+	_forget_template(template_name)
+	get_template_store().refresh(template_name)
+
+def _forget_template(template_name) -> None:
+	"""Drop a template from the load cache after writing it."""
+	template_path = get_user_data_path("coord_templates", f"{template_name}.json")
+	with _TEMPLATE_CACHE_LOCK:
+		_TEMPLATE_CACHE.pop(template_path, None)
+
+class PlanField:
+	"""A template field with its font, color and opacity already resolved for drawing."""
+	__slots__ = ("name", "position", "font", "fallback_fonts", "rgb", "opacity", "font_size", "font_style", "color", "atlas", "tiling")
+	
+	def __init__(self, name, position, font, fallback_fonts, rgb, opacity, font_size, font_style, color, atlas=None, tiling=None):
+		for slot, value in zip(self.__slots__, (name, position, font, tuple(fallback_fonts), rgb, opacity, font_size, font_style, color, atlas, tiling)):
+			object.__setattr__(self, slot, value)
+	
+	def __setattr__(self, name, value):
+		raise AttributeError("PlanField is immutable")
+	
+	def __repr__(self):
+		return f"PlanField({self.name!r}, position={self.position}, size={self.font_size}, rgb={self.rgb}, opacity={self.opacity})"
+	
+	def draw(self, image: Image.Image, text) -> Image.Image:
+		if self.tiling:
+			return _draw_tiled(image, text, self.rgb, self.font, self.opacity, self.fallback_fonts, self.tiling, self.position)
+		return _draw_text_rgb(image, self.position, text, self.rgb, self.font, self.opacity, self.fallback_fonts, atlas=self.atlas)
+
+
+class TemplatePlan:
+	"""
+	A compiled template: immutable, ordered fields ready to draw, plus the names
+	of fields that were dropped because they can't render (opacity 0 or off-canvas).
+	"""
+	__slots__ = ("name", "fields", "skipped", "image_size", "_by_name")
+	
+	def __init__(self, name, fields, skipped=(), image_size=None):
+		object.__setattr__(self, "name", name)
+		object.__setattr__(self, "fields", tuple(fields))
+		object.__setattr__(self, "skipped", frozenset(skipped))
+		object.__setattr__(self, "image_size", image_size)
+		object.__setattr__(self, "_by_name", {field.name: field for field in self.fields})
+	
+	def __setattr__(self, name, value):
+		raise AttributeError("TemplatePlan is immutable")
+	
+	def __repr__(self):
+		return f"TemplatePlan({self.name!r}, fields={[field.name for field in self.fields]}, skipped={sorted(self.skipped)})"
+	
+	def __len__(self):
+		return len(self.fields)
+	
+	def __contains__(self, name):
+		return name in self._by_name
+	
+	def field(self, name):
+		"""Return the PlanField for a name, or None if it isn't drawable."""
+		return self._by_name.get(name)
+	
+	def subset(self, names) -> "TemplatePlan":
+		"""Return a plan containing only the given fields (order preserved)."""
+		names = set(names)
+		return TemplatePlan(self.name, [field for field in self.fields if field.name in names],
+							self.skipped, self.image_size)
+	
+	def render(self, image: Image.Image, text_mapping: dict, verbose=False) -> Image.Image:
+		"""
+		Draw texts onto an image, in text_mapping order, without any further parsing.
+		
+		Args:
+			image: Image to draw on (may be modified in place)
+			text_mapping: Dictionary mapping point names to text strings
+			verbose: If True, print what was applied and warn about unknown points
+		
+		Returns:
+			Image.Image: The edited image
+		"""
+		by_name = self._by_name
+		# Translucent fields are collected on one shared overlay and composited once;
+		# the group is flushed before any field that overlaps it, so draw order is kept
+		pending = []
+		for point_name, text in text_mapping.items():
+			field = by_name.get(point_name)
+			if field is None:
+				if verbose and point_name not in self.skipped:
+					print(f"Warning: Point '{point_name}' not found in template, skipping")
+				continue
+			if not text:
+				continue
+			if field.tiling:
+				# A tiled field covers the whole image, so anything pending goes underneath it first
+				if pending:
+					image = _composite_translucent(image, pending)
+					pending = []
+				image = field.draw(image, text)
+			elif field.opacity >= 100 and not pending:
+				image = field.draw(image, text)
+			else:
+				if image.mode not in ("RGB", "RGBA"):
+					image = image.convert("RGBA")
+				runs = _text_runs(text, field.font, field.fallback_fonts)
+				box = _clip_box(_text_bbox(ImageDraw.Draw(image), field.position, text, field.font, runs), image.size)
+				if box is not None:
+					if any(_boxes_overlap(box, item[5]) for item in pending):
+						image = _composite_translucent(image, pending)
+						pending = []
+					if field.opacity >= 100:
+						image = _draw_text_rgb(image, field.position, text, field.rgb, field.font, 100, runs=runs, atlas=field.atlas)
+					else:
+						fill = (*field.rgb, int(255 * (field.opacity / 100)))
+						pending.append((field.position, text, field.font, runs, fill, box, field.atlas))
+			if verbose:
+				print(f"Applied '{text}' at {point_name} {field.position} with {field.font_size}px {field.color} font")
+		if pending:
+			image = _composite_translucent(image, pending)
+		return image
+	
+	def field_box(self, image: Image.Image, name, text):
+		"""Clipped pixel box a field's text can touch on this image, or None if it draws nothing."""
+		field = self._by_name.get(name)
+		if field is None or not text:
+			return None
+		if field.tiling:
+			return (0, 0, image.size[0], image.size[1])
+		runs = _text_runs(text, field.font, field.fallback_fonts)
+		# Measure on a scratch image: only the mode matters, and the image may be a read-only shared view
+		draw = ImageDraw.Draw(Image.new(image.mode, (1, 1)))
+		return _clip_box(_text_bbox(draw, field.position, text, field.font, runs), image.size)
+	
+	def bake(self, image: Image.Image, static_mapping: dict) -> "StaticLayer":
+		"""Draw fields that are the same in every row once, returning a StaticLayer to render rows on."""
+		return StaticLayer(self, image, static_mapping)
+
+
+class StaticLayer:
+	"""
+	A base image with a batch's constant fields already drawn on it.
+	
+	render() copies the baked image and draws only the fields that vary. The result
+	matches drawing every field in row order on the plain base: a row falls back to
+	a full draw when a baked field is missing, changed or reordered, or when a
+	varying field that comes before a baked one overlaps it (it would end up on top).
+	"""
+	
+	def __init__(self, plan: TemplatePlan, image: Image.Image, static_mapping: dict, baked=None):
+		self.plan = plan
+		self.base = image
+		self.static = {name: text for name, text in static_mapping.items() if name in plan and text}
+		self.order = tuple(self.static)
+		self.boxes = {name: plan.field_box(image, name, text) for name, text in self.static.items()}
+		# baked: the same static fields already drawn elsewhere (e.g. by the parent of a process pool)
+		self.image = baked if baked is not None else plan.render(self._fresh(image), self.static)
+		self.stats = {"rows": 0, "fallbacks": 0}
+	
+	@staticmethod
+	def _fresh(image: Image.Image) -> Image.Image:
+		"""A private RGB copy to draw on; shared-memory views are read-only RGBX and get converted."""
+		return image.convert("RGB") if image.mode == "RGBX" else image.copy()
+	
+	def with_plan(self, plan: TemplatePlan) -> "StaticLayer":
+		"""Share this baked image with an equivalent plan, e.g. one compiled on another thread with its own fonts."""
+		layer = copy.copy(self)
+		layer.plan = plan
+		layer.stats = {"rows": 0, "fallbacks": 0}
+		return layer
+	
+	def _can_reuse(self, text_mapping: dict) -> bool:
+		static = self.static
+		seen = [name for name, text in text_mapping.items() if name in static and text == static[name]]
+		if tuple(seen) != self.order:
+			return False
+		remaining = set(self.order)
+		for name, text in text_mapping.items():
+			if name in remaining:
+				remaining.discard(name)
+				if not remaining:
+					break
+				continue
+			box = self.plan.field_box(self.base, name, text)
+			if box is not None and any(self.boxes[other] and _boxes_overlap(box, self.boxes[other]) for other in remaining):
+				return False
+		return True
+	
+	def render(self, text_mapping: dict, verbose=False) -> Image.Image:
+		"""Render one row onto a copy of the baked image (or of the plain base when it can't be reused)."""
+		self.stats["rows"] += 1
+		if not self._can_reuse(text_mapping):
+			self.stats["fallbacks"] += 1
+			return self.plan.render(self._fresh(self.base), text_mapping, verbose)
+		varying = {name: text for name, text in text_mapping.items() if name not in self.static}
+		return self.plan.render(self._fresh(self.image), varying, verbose)
+
+
+def _static_fields(rows) -> dict:
+	"""Fields present with the same non-empty text in every row, in first-row order."""
+	if not rows:
+		return {}
+	static = {name: text for name, text in rows[0].items() if text}
+	for row in rows[1:]:
+		static = {name: text for name, text in static.items() if row.get(name) == text}
+		if not static:
+			break
+	return static
+
+
+def compile_template(template_name, font_overrides=None, text_color=(0, 0, 0), font_size=20, opacity=100, image_size=None) -> TemplatePlan:
+	"""
+	Resolve a template into a reusable render plan.
+	
+	Fonts are loaded, colors parsed and overrides merged once, so rendering the
+	plan for every row of a batch does no parsing or lookups.
+	
+	Args:
+		template_name: Name of the template (without .json extension)
+		font_overrides: Optional dict mapping point names to font settings to override template
+		text_color: Default text color for fields without one
+		font_size: Default font size for fields without one
+		opacity: Default opacity for fields without one
+		image_size: Optional (width, height); fields positioned outside it are dropped
+	
+	Returns:
+		TemplatePlan: The compiled plan
+	"""
+	coords = load_template(template_name)
+	
+	# Debug: Print font overrides
+	if font_overrides:
+		_debug(f"DEBUG: Font overrides received: {font_overrides}")
+	
+	fields = []
+	skipped = []
+	for point_name, point_data in template_fields(coords):
+		# Overrides win over point-specific settings, which win over the defaults
+		overrides = (font_overrides or {}).get(point_name) or {}
+		point_font_size = overrides.get("font_size", point_data.get("font_size", font_size))
+		point_color = overrides.get("font_color", point_data.get("font_color", text_color))
+		point_style = overrides.get("font_style", point_data.get("font_style", "default"))
+		point_opacity = _clamp_opacity(overrides.get("opacity", point_data.get("opacity", opacity)))
+		point_fallbacks = overrides.get("font_fallbacks", point_data.get("font_fallbacks"))
+		point_render_mode = overrides.get("render_mode", point_data.get("render_mode", "text"))
+		position = (point_data["x"], point_data["y"])
+		_debug(f"DEBUG: Compiled {point_name}: size={point_font_size}, color={point_color}, style={point_style}, overrides={bool(overrides)}")
+		
+		if point_opacity <= 0:
+			skipped.append(point_name)
+			continue
+		# A tiled field's position only sets where the repeating pattern starts, so it may lie anywhere
+		tiling = field_tiling(point_data, point_font_size, overrides)
+		if not tiling and image_size and (position[0] >= image_size[0] or position[1] >= image_size[1]):
+			_debug(f"DEBUG: Skipping {point_name}: position {position} is outside {image_size}")
+			skipped.append(point_name)
+			continue
+		
+		font = _load_font(point_style, point_font_size)
+		fields.append(PlanField(
+			point_name,
+			position,
+			font,
+			_load_fallback_fonts(point_fallbacks, point_font_size),
+			_normalize_color(point_color),
+			point_opacity,
+			point_font_size,
+			point_style,
+			point_color,
+			_get_glyph_atlas(font) if point_render_mode == "atlas" else None,
+			tiling,
+		))
+	return TemplatePlan(template_name, fields, skipped, image_size)
 
-def apply_template_to_image(image_path, template_name, text_mapping: dict, text_color=(0, 0, 0), font_size=20, font_overrides=None, output_path=None, opacity=100) -> Image.Image:
+def apply_template_to_image(image_path, template_name, text_mapping: dict, text_color=(0, 0, 0), font_size=20, font_overrides=None, output_path=None, opacity=100, writer=None, encoder_profile=None) -> Image.Image:
 	"""
 	Apply multiple texts to an image using a saved coordinate template.
 	
@@ -368,6 +2394,13 @@ def apply_template_to_image(image_path, template_name, text_mapping: dict, text_
 		font_size: Size of the font
 		font_overrides: Optional dict mapping point names to font settings to override template
 			Example: {"name": {"font_size": 25, "font_color": "red", "font_style": "Arial"}}
+			A "font_fallbacks" list of font names is used for characters the font lacks.
+		output_path: Where to save; by default a new name in the app's outputs/ folder
+			(config "output_name_pattern", e.g. "{stem}_{name}_{hash:.8}"; see OutputNamer)
+		writer: Optional OutputWriter; the file is then written in the background
+			(it exists once the writer is flushed or closed)
+		encoder_profile: Save settings (see ENCODER_PROFILES); defaults to the
+			template's "encoder_profile", if it has one
 	
 	Returns:
 		Image.Image: The edited image
@@ -380,69 +2413,840 @@ def apply_template_to_image(image_path, template_name, text_mapping: dict, text_
 	if not isinstance(font_size, int) or font_size <= 0:
 		raise ValueError("Font size must be a positive integer")
 	
-	# Load the template
-	template_path = get_user_data_path("coord_templates", f"{template_name}.json")
-	if not os.path.exists(template_path):
-		raise FileNotFoundError(f"Template not found: {template_path}")
-	
-	with open(template_path, "r") as f:
-		coords = json.load(f)
-	
-	# Load image
-	image = Image.open(image_path).convert("RGB")
-	
-	# Debug: Print font overrides
-	if font_overrides:
-		_debug(f"DEBUG: Font overrides received: {font_overrides}")
+	# Load image (a private copy of the cached decode)
+	image = _open_base_image(image_path)
 	
-	# Apply each text to its named coordinate
-	for point_name, text in text_mapping.items():
-		if point_name not in coords:
-			print(f"Warning: Point '{point_name}' not found in template, skipping")
-			continue
-		
-		point_data = coords[point_name]
-		position = (point_data["x"], point_data["y"])
-		
-		# Check if there are overrides for this point
-		if font_overrides and point_name in font_overrides:
-			overrides = font_overrides[point_name]
-			point_font_size = overrides.get("font_size", point_data.get("font_size", font_size))
-			point_color = overrides.get("font_color", point_data.get("font_color", text_color))
-			point_style = overrides.get("font_style", point_data.get("font_style", "default"))
-			point_opacity = overrides.get("opacity", point_data.get("opacity", opacity))
-			_debug(f"DEBUG: Using overrides for {point_name}: size={point_font_size}, color={point_color}, style={point_style}")
-		else:
-			# Use point-specific font settings if available, otherwise use defaults
-			point_font_size = point_data.get("font_size", font_size)
-			point_color = point_data.get("font_color", text_color)
-			point_style = point_data.get("font_style", "default")
-			point_opacity = point_data.get("opacity", opacity)
-			_debug(f"DEBUG: Using template defaults for {point_name}: size={point_font_size}, color={point_color}, style={point_style}")
-		
-		# Load font with point-specific size
-		font = _load_font(point_style, point_font_size)
-		
-		image = _draw_text(image, position, text, point_color, font, opacity=point_opacity)
-		print(f"Applied '{text}' at {point_name} {position} with {point_font_size}px {point_color} font")
+	# Resolve fonts, colors and overrides once, then draw each text at its named coordinate
+	plan = compile_template(template_name, font_overrides, text_color, font_size, opacity, image_size=image.size)
+	image = plan.render(image, text_mapping, verbose=True)
 	
 	# Use custom output path if provided, otherwise use default
+	if encoder_profile is None:
+		encoder_profile = template_encoder_profile(template_name)
 	if output_path is None:
-		basename = os.path.basename(image_path)
-		name, ext = os.path.splitext(basename)
-		outputs_dir = ensure_user_dir("outputs")
-		output_path = os.path.join(outputs_dir, f"{name}_edited{ext}")
+		output_path = _default_output_path(image_path, text_mapping, encoder_profile)
 	else:
 		# Ensure directory exists for custom output path
 		output_dir = os.path.dirname(output_path)
 		if output_dir:  # Only create if there's a directory component
 			os.makedirs(output_dir, exist_ok=True)
 	
-	image.convert("RGB").save(output_path)
-	print(f"Image saved to {output_path}")
+	output_path, image_format, save_params = resolve_encoder_profile(encoder_profile, output_path)
+	if writer is not None:
+		writer.submit(image.convert("RGB"), output_path, image_format, **save_params)
+		_debug(f"DEBUG: Image queued for {output_path}")
+	else:
+		_save_image_atomic(image.convert("RGB"), output_path, image_format, **save_params)
+		print(f"Image saved to {output_path}")
 	
 	return image
 
+def apply_template_batch(image_path, template_name, rows, text_color=(0, 0, 0), font_size=20, font_overrides=None, output_dir=None, opacity=100) -> list:
+	"""
+	Apply a template to one image once per row of texts, saving one image per row.
+	
+	Fields whose text is the same in every row are drawn once onto a pre-baked
+	copy of the base; each row then only draws the fields that vary.
+	
+	Args:
+		image_path: Path to the image
+		template_name: Name of the template (without .json extension)
+		rows: List of dictionaries mapping point names to text strings
+		text_color: Default text color
+		font_size: Default font size
+		font_overrides: Optional dict mapping point names to font settings to override template
+		output_dir: Directory for the results (defaults to the app's outputs/ folder)
+		opacity: Default opacity
+	
+	Returns:
+		list: Paths of the saved images, in row order
+	"""
+	# Validate inputs
+	if not template_name or not isinstance(template_name, str):
+		raise ValueError("Template name must be a non-empty string")
+	rows = list(rows)
+	if not rows or not all(isinstance(row, dict) for row in rows):
+		raise ValueError("Rows must be a non-empty list of dictionaries")
+	if not isinstance(font_size, int) or font_size <= 0:
+		raise ValueError("Font size must be a positive integer")
+	
+	if output_dir is None:
+		output_dir = ensure_user_dir("outputs")
+	batch = render_batch(template_name, image_path, rows, output_dir, "{stem}_{index:04d}", text_color, font_size,
+						 font_overrides, opacity, lookahead=len(rows))
+	output_paths = [output_path for _, output_path in batch]
+	print(f"Saved {len(output_paths)} images to {output_dir}")
+	return output_paths
+
+def iter_rows(source, delimiter=","):
+	"""
+	Lazily yield rows (dicts of column -> text) from a file or an iterable.
+	
+	Args:
+		source: Path to a .csv/.tsv file (header row = point names), a .jsonl/.ndjson
+			file (one JSON object per line), or any iterable of mappings
+		delimiter: CSV delimiter (.tsv files always use tabs)
+	
+	Yields:
+		dict: One row at a time; nothing is read ahead
+	"""
+	if not isinstance(source, (str, os.PathLike)):
+		for row in source:
+			if not isinstance(row, Mapping):
+				raise ValueError("Rows must be mappings of point names to text")
+			yield row
+		return
+	
+	path = os.fspath(source)
+	ext = os.path.splitext(path)[1].lower()
+	if ext in (".jsonl", ".ndjson"):
+		with open(path, "r", encoding="utf-8") as f:
+			for line_number, line in enumerate(f, 1):
+				line = line.strip()
+				if not line:
+					continue
+				row = json.loads(line)
+				if not isinstance(row, dict):
+					raise ValueError(f"{path}:{line_number}: expected a JSON object")
+				yield {str(key): "" if value is None else str(value) for key, value in row.items()}
+	elif ext in (".csv", ".tsv", ".txt"):
+		with open(path, "r", encoding="utf-8-sig", newline="") as f:
+			yield from csv.DictReader(f, delimiter="\t" if ext == ".tsv" else delimiter, restval="")
+	else:
+		raise ValueError(f"Unsupported rows file (expected .csv, .tsv or .jsonl): {path}")
+
+def _safe_filename_part(value) -> str:
+	text = "".join("_" if ch in '<>:"/\\|?*' or ord(ch) < 32 else ch for ch in str(value))
+	return text.strip(" .") or "_"
+
+def _row_hash(stem, row) -> str:
+	"""SHA-1 hex digest of a base image name and a row's texts, independent of column order."""
+	payload = json.dumps([stem, {str(key): str(value) for key, value in row.items()}], ensure_ascii=False, sort_keys=True)
+	return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+class OutputNamer:
+	"""
+	Hand out output paths from a name pattern, for batches too big for one flat folder.
+	
+	The pattern is a str.format string (it may contain subfolders) over the row's
+	columns, sanitized for file names, plus:
+		{stem}     base image name without its extension
+		{index}    row number (1-based in render_batch)
+		{counter}  number of names this namer has handed out so far, from 1
+		{hash}     SHA-1 hex digest of the base name and the row's texts ({hash:.8} for a prefix)
+	Without an extension in the pattern the base image's is used; an encoder profile
+	that converts (e.g. "web") swaps in its own.
+	
+	With shard_levels=N every file goes N folders deeper, into two-hex-digit folders
+	taken from a hash of its name ("3f/a2/name.png"). That spreads a batch over 256^N
+	folders, so none of them grows to hundreds of thousands of entries.
+	
+	Collisions are caught in memory instead of checking the disk for every file: a
+	folder's existing entries are listed once, when the first name lands in it, and
+	a name that is already taken gets "_2", "_3", ... before its extension. At most
+	`max_names` names (config "output_namer_max_names") are remembered; beyond that
+	the least recently used folders are forgotten and listed again if they come back,
+	and a single folder bigger than the bound is no longer checked. Names of files
+	still being written when their folder is forgotten, and files other programs
+	create meanwhile, aren't seen.
+	
+	track_collisions=None turns the checks off where they can't help or would only
+	cost memory: without a directory (archive entries), with overwrite=True, and for
+	patterns that are unique by construction ({index}, {counter}, or a full {hash}:
+	equal hashes mean equal texts). A shortened hash such as {hash:.8} can collide,
+	so it is still checked. Folders are created as they are first used. Safe to
+	share between threads.
+	"""
+	
+	def __init__(self, directory, pattern, shard_levels=0, overwrite=False, track_collisions=None, max_names=None):
+		self.directory = None if directory is None else os.fspath(directory)
+		self.pattern = pattern
+		self.shard_levels = max(0, min(int(shard_levels or 0), 4))
+		self.overwrite = overwrite
+		fields = [(field.split(".")[0].split("[")[0], spec or "")
+				  for _, field, spec, _ in string.Formatter().parse(pattern) if field]
+		self._needs_hash = any(field == "hash" for field, _ in fields)
+		# A precision ({hash:.8}) truncates the hash, and a truncated hash isn't unique
+		unique = any(field in _UNIQUE_NAME_FIELDS and not (field == "hash" and "." in spec) for field, spec in fields)
+		if track_collisions is None:
+			track_collisions = not overwrite and not unique
+		self.track_collisions = bool(track_collisions) and self.directory is not None
+		self.max_names = OUTPUT_NAMER_MAX_NAMES if max_names is None else max(1, int(max_names))
+		self.counter = 0
+		# folder -> set of taken names (None once the folder outgrew max_names), least recently used first
+		self._folders: "OrderedDict[str, set]" = OrderedDict()
+		self._names = 0
+		self._created: "OrderedDict[str, None]" = OrderedDict()
+		self._lock = threading.Lock()
+	
+	def name(self, row, stem="", ext="", index=None, encoder_profile=None) -> str:
+		"""
+		Reserve the output name for one row.
+		
+		Args:
+			row: Mapping of column -> text
+			stem, ext: Base image name and extension
+			index: Value of {index} (defaults to the counter)
+			encoder_profile: Profile the file will be saved with, which may change its extension
+		
+		Returns:
+			str: Path relative to the namer's directory ("/"-separated without a directory)
+		"""
+		values = {key: _safe_filename_part(value) for key, value in row.items()}
+		with self._lock:
+			self.counter += 1
+			values.update(stem=stem, index=self.counter if index is None else index, counter=self.counter)
+			if self._needs_hash:
+				values["hash"] = _row_hash(stem, row)
+			try:
+				name = self.pattern.format_map(values)
+			except KeyError as e:
+				raise ValueError(f"Output name pattern refers to unknown column {e}") from None
+			if not os.path.splitext(name)[1]:
+				name += ext
+			name = resolve_encoder_profile(encoder_profile, name)[0]
+			*folders, base = [part for part in name.replace("\\", "/").split("/") if part]
+			if self.shard_levels:
+				digest = hashlib.sha1(base.encode("utf-8")).hexdigest()
+				folders += [digest[2 * level:2 * level + 2] for level in range(self.shard_levels)]
+			folder = "/".join(folders)
+			candidate = base
+			if self.track_collisions:
+				taken = self._taken_names(folder)
+			else:
+				taken = None
+				self._make_folder(folder)
+			if taken is not None:
+				root, ext = os.path.splitext(base)
+				number = 1
+				while os.path.normcase(candidate) in taken:
+					number += 1
+					candidate = f"{root}_{number}{ext}"
+				taken.add(os.path.normcase(candidate))
+				self._names += 1
+				self._forget_folders(folder)
+		return (os.sep if self.directory is not None else "/").join(folders + [candidate])
+	
+	def path(self, row, stem="", ext="", index=None, encoder_profile=None) -> str:
+		"""Reserve the output name for one row and return it joined to the namer's directory."""
+		return os.path.join(self.directory, self.name(row, stem, ext, index, encoder_profile))
+	
+	def _folder_path(self, folder) -> str:
+		return os.path.join(self.directory, *folder.split("/")) if folder else self.directory
+	
+	def _make_folder(self, folder) -> None:
+		"""Create a folder on first use (remembering a bounded number of them)."""
+		if self.directory is None:
+			return
+		if folder in self._created:
+			self._created.move_to_end(folder)
+			return
+		os.makedirs(self._folder_path(folder), exist_ok=True)
+		self._created[folder] = None
+		if len(self._created) > OUTPUT_NAMER_FOLDERS:
+			self._created.popitem(last=False)
+	
+	def _taken_names(self, folder):
+		"""The taken names of a folder, listing (or creating) it on first use; None if it isn't checked."""
+		if folder in self._folders:
+			self._folders.move_to_end(folder)
+			return self._folders[folder]
+		taken = set()
+		try:
+			with os.scandir(self._folder_path(folder)) as entries:
+				for entry in entries:
+					taken.add(os.path.normcase(entry.name))
+		except FileNotFoundError:
+			os.makedirs(self._folder_path(folder), exist_ok=True)
+		self._folders[folder] = taken
+		self._names += len(taken)
+		self._forget_folders(folder)
+		return self._folders[folder]
+	
+	def _forget_folders(self, current) -> None:
+		"""Drop the least recently used folders until at most max_names names are remembered."""
+		while self._names > self.max_names and len(self._folders) > 1:
+			_, taken = self._folders.popitem(last=False)
+			self._names -= len(taken or ())
+		if self._names > self.max_names and self._folders.get(current) is not None:
+			print(f"Warning: Output folder {self._folder_path(current)!r} holds more than {self.max_names} names; "
+				  f"no longer checking it for collisions")
+			self._names -= len(self._folders[current])
+			self._folders[current] = None
+
+def _default_output_path(image_path, row, encoder_profile=None) -> str:
+	"""
+	The next free path in the app's outputs/ folder, named by the configured
+	output_name_pattern. A single save just probes its candidate names ("_2",
+	"_3", ...) on disk rather than listing the folder, so it stays cheap however
+	many outputs are there, and deleted files free their names again.
+	"""
+	if not isinstance(image_path, (str, os.PathLike)):
+		# File objects may carry a name; in-memory buffers don't
+		image_path = getattr(image_path, "name", None) or "image.png"
+	stem, ext = os.path.splitext(os.path.basename(image_path))
+	namer = OutputNamer(ensure_user_dir("outputs"), OUTPUT_NAME_PATTERN, OUTPUT_SHARD_LEVELS, track_collisions=False)
+	output_path = namer.path(row, stem, ext, encoder_profile=encoder_profile)
+	root, ext = os.path.splitext(output_path)
+	number = 1
+	while os.path.exists(output_path):
+		number += 1
+		output_path = f"{root}_{number}{ext}"
+	return output_path
+
+def _batch_row_target(name, output_dir, encoder_profile=None):
+	"""A row's (output_path, format, save settings) from its reserved name; with output_dir None, the name is an archive entry."""
+	return resolve_encoder_profile(encoder_profile, name if output_dir is None else os.path.join(output_dir, name))
+
+def _render_batch_row(layer, row, name, output_dir, encoder_profile=None) -> str:
+	"""Draw one batch row on the static layer and save it under its reserved name; returns the output path."""
+	output_path, image_format, save_params = _batch_row_target(name, output_dir, encoder_profile)
+	_save_image_atomic(layer.render(row).convert("RGB"), output_path, image_format, **save_params)
+	return output_path
+
+# Per-worker state of a render_batch() pool (a process, or a thread in thread mode)
+_BATCH_WORKER = threading.local()
+
+class _SharedImage:
+	"""
+	An RGB image published in shared memory for pool workers.
+	
+	Stored as RGBX, the one 8-bit RGB layout Pillow can map straight from a buffer,
+	so workers wrap it with Image.frombuffer without decoding or copying it.
+	"""
+	
+	def __init__(self, image: Image.Image):
+		data = image.convert("RGBX").tobytes()
+		self.size = image.size
+		self._shm = shared_memory.SharedMemory(create=True, size=len(data))
+		self._shm.buf[:len(data)] = data
+		self.spec = (self._shm.name, self.size)
+	
+	def close(self) -> None:
+		self._shm.close()
+		self._shm.unlink()
+
+def _attach_shared_image(spec):
+	"""Map a _SharedImage in a worker; returns (shm, read-only RGBX image). Keep shm alive while the image is used."""
+	name, size = spec
+	shm = shared_memory.SharedMemory(name=name)
+	return shm, Image.frombuffer("RGBX", size, shm.buf, "raw", "RGBX", 0, 1)
+
+def _batch_worker_init(template_name, base_spec, baked_spec, compile_args, static_mapping, output_args):
+	"""Process pool initializer: map the shared base and baked images, and compile the template (loading its fonts)."""
+	base_shm, base = _attach_shared_image(base_spec)
+	baked_shm, baked = _attach_shared_image(baked_spec) if baked_spec != base_spec else (base_shm, base)
+	plan = compile_template(template_name, *compile_args, image_size=base.size)
+	_BATCH_WORKER.shared = (base_shm, baked_shm)
+	_BATCH_WORKER.state = (StaticLayer(plan, base, static_mapping, baked=baked), *output_args)
+
+def _batch_thread_init(template_name, layer, compile_args, output_args):
+	"""Thread pool initializer: compile the template with this thread's own fonts, sharing the baked layer."""
+	plan = compile_template(template_name, *compile_args, image_size=layer.base.size)
+	_BATCH_WORKER.state = (layer.with_plan(plan), *output_args)
+
+def _batch_worker_render(chunk) -> list:
+	layer, *output_args = _BATCH_WORKER.state
+	return [(index, _render_batch_row(layer, row, name, *output_args)) for index, (row, name) in chunk]
+
+def _batch_worker_encode(chunk) -> list:
+	"""Pool task for archive output: render and encode rows, returning (index, (entry_name, bytes)) for the parent to write."""
+	layer, *output_args = _BATCH_WORKER.state
+	results = []
+	for index, (row, name) in chunk:
+		name, image_format, save_params = _batch_row_target(name, *output_args)
+		results.append((index, (name, _encode_image(layer.render(row).convert("RGB"), image_format, **save_params))))
+	return results
+
+def _render_batch_pool(indexed_rows, workers, ordered, chunk_size, initializer, initargs, executor_class=ProcessPoolExecutor,
+					   task=_batch_worker_render):
+	"""
+	Run render_batch rows on a process (or thread) pool, yielding (index, output_path).
+	
+	`task` renders a chunk of (index, item) pairs in a worker set up by `initializer`
+	and returns (index, result) pairs; stamp_directory() reuses the pool this way.
+	
+	Rows go out in chunks with at most two chunks per worker in flight, so memory
+	stays flat. If a worker process dies the pool is rebuilt and the chunks that were
+	lost with it are retried one at a time; a chunk that crashes again on its own is
+	split into single rows, and only a row that keeps crashing is skipped.
+	"""
+	chunks = iter(lambda: list(itertools.islice(indexed_rows, chunk_size)), [])
+	retry = []
+	crashes = {}
+	ready = {}
+	next_index = 1
+	in_flight = {}
+	isolated = None
+	executor = executor_class(max_workers=workers, initializer=initializer, initargs=initargs)
+	
+	try:
+		while True:
+			# Retries run alone so a crash can be pinned on the chunk that caused it
+			if retry:
+				if not in_flight:
+					chunk = retry.pop(0)
+					isolated = executor.submit(task, chunk)
+					in_flight[isolated] = chunk
+			else:
+				while len(in_flight) < workers * 2:
+					chunk = next(chunks, None)
+					if chunk is None:
+						break
+					in_flight[executor.submit(task, chunk)] = chunk
+			if not in_flight:
+				break
+			done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+			broken = False
+			for future in done:
+				chunk = in_flight.pop(future)
+				try:
+					results = future.result()
+				except BrokenProcessPool:
+					broken = True
+					if future is not isolated:
+						retry.append(chunk)
+					elif len(chunk) > 1:
+						retry[:0] = [[item] for item in chunk]
+					else:
+						index = chunk[0][0]
+						crashes[index] = crashes.get(index, 0) + 1
+						if crashes[index] > BATCH_MAX_RETRIES:
+							print(f"Warning: Row {index} crashed a worker {crashes[index]} times, skipping it")
+							ready[index] = []
+						else:
+							retry.insert(0, chunk)
+					continue
+				if ordered:
+					ready[chunk[0][0]] = results
+				else:
+					yield from results
+			if broken:
+				# Every chunk still in flight died with the pool
+				retry.extend(in_flight.values())
+				in_flight.clear()
+				print(f"Warning: A batch worker crashed, restarting the pool and retrying {len(retry)} chunk(s)")
+				executor.shutdown(wait=False, cancel_futures=True)
+				executor = executor_class(max_workers=workers, initializer=initializer, initargs=initargs)
+			if ordered:
+				while next_index in ready:
+					results = ready.pop(next_index)
+					yield from results
+					next_index = results[-1][0] + 1 if results else next_index + 1
+	finally:
+		executor.shutdown(wait=True, cancel_futures=True)
+
+def _store_batch_result(sink, result):
+	"""Write an (entry_name, bytes) result into the archive sink and return the name; without a sink, result is already a path."""
+	if sink is None:
+		return result
+	name, data = result
+	sink.add(name, data)
+	return name
+
+def render_batch(template, base_image, rows, output_dir=None, name_pattern="{stem}_{index:06d}", text_color=(0, 0, 0),
+				 font_size=20, font_overrides=None, opacity=100, lookahead=BATCH_LOOKAHEAD_ROWS,
+				 workers=None, ordered=True, chunk_size=BATCH_CHUNK_SIZE, pool="process", writer=None, stats=None,
+				 encoder_profile=None, archive=None, shard_levels=None, overwrite=False):
+	"""
+	Render a template once per row as a generator, saving each image as soon as it's drawn.
+	
+	Rows are consumed lazily, so memory stays flat however long the input is. The
+	first `lookahead` rows are used to pick fields to pre-bake (text identical in all
+	of them); later rows that differ there just get a full redraw.
+	
+	Args:
+		template: Template name, or an already compiled TemplatePlan
+		base_image: Path to the base image, or a PIL Image
+		rows: CSV/TSV/JSONL path or iterable of mappings (see iter_rows)
+		output_dir: Directory for the results (defaults to the app's outputs/ folder)
+		name_pattern: str.format pattern for file names; row columns plus {index} (1-based),
+			{stem} (base image name) and {hash} (of the row), e.g. "{last_name}_{index:05d}.jpg"
+			(see OutputNamer). Unless the pattern has {index}, {counter} or a full {hash}, a name
+			already taken, on disk or earlier in the batch, gets "_2", "_3", ... appended
+			instead of being overwritten
+		text_color, font_size, font_overrides, opacity: Defaults used to compile a template name
+		lookahead: Number of rows inspected for constant fields
+		workers: Render on this many processes or threads (needs a template name, not a plan)
+		ordered: With workers, yield rows in input order; False yields them as they finish
+		chunk_size: With workers, number of rows handed to a worker at a time
+		pool: "process", or "thread" to render in this process (each thread gets its own fonts)
+		writer: OutputWriter that encodes and saves rows while the next ones render
+			(without workers; by default a private one is used)
+		stats: Optional dict, filled in with rows, render_seconds and (without workers)
+			the writer's files, bytes, encode_seconds and wait_seconds
+		encoder_profile: Save settings (see ENCODER_PROFILES); defaults to the
+			template's "encoder_profile", if it has one
+		archive: A .zip/.tar path or an ArchiveSink to stream the images into instead
+			of writing files to output_dir; name_pattern then names the entries. A path
+			is finalized when the batch completes and discarded if it doesn't
+		shard_levels: Spread the outputs over this many levels of hash-prefix folders
+			(256 per level; defaults to config "output_shard_levels")
+		overwrite: Replace files already in output_dir instead of picking new names
+			(archive entries are never renamed; keep them apart with {index} or {hash})
+	
+	Yields:
+		tuple: (index, output_path) for each row, once its file is in place
+		(with archive: (index, entry_name), once the entry is written)
+	"""
+	if isinstance(base_image, Image.Image):
+		filename = getattr(base_image, "filename", "") or "image.png"
+		image = base_image.convert("RGB")
+	else:
+		filename = os.fspath(base_image)
+		image = _open_base_image(filename)
+	stem, ext = os.path.splitext(os.path.basename(filename))
+	
+	if archive is not None:
+		output_dir = None
+	elif output_dir is None:
+		output_dir = ensure_user_dir("outputs")
+	else:
+		os.makedirs(output_dir, exist_ok=True)
+	
+	rows = iter_rows(rows)
+	head = list(itertools.islice(rows, max(0, lookahead)))
+	static_mapping = _static_fields(head) if len(head) > 1 else {}
+	indexed_rows = enumerate(itertools.chain(head, rows), 1)
+	if encoder_profile is None and not isinstance(template, TemplatePlan):
+		encoder_profile = template_encoder_profile(template)
+	resolve_encoder_profile(encoder_profile, "check.png")
+	output_args = (output_dir, encoder_profile)
+	# Names are reserved here, in input order, so collisions are caught in one place
+	# even when the rows are rendered on other processes
+	namer = OutputNamer(output_dir, name_pattern, OUTPUT_SHARD_LEVELS if shard_levels is None else shard_levels, overwrite)
+	indexed_rows = ((index, (row, namer.name(row, stem, ext, index, encoder_profile))) for index, row in indexed_rows)
+	
+	own_sink = archive is not None and not isinstance(archive, ArchiveSink)
+	sink = ArchiveSink(archive) if own_sink else archive
+	completed = False
+	try:
+		yield from _render_batch_outputs(template, image, indexed_rows, static_mapping, output_args,
+										 (font_overrides, text_color, font_size, opacity),
+										 workers, ordered, chunk_size, pool, writer, stats, sink)
+		completed = True
+	finally:
+		if own_sink:
+			if completed:
+				sink.close()
+			else:
+				sink.abort()
+
+def _render_batch_outputs(template, image, indexed_rows, static_mapping, output_args, compile_args,
+						  workers, ordered, chunk_size, pool, writer, stats, sink):
+	"""The rendering half of render_batch(): serial with a background writer, or on a worker pool."""
+	if workers and workers > 1:
+		if pool not in ("process", "thread"):
+			raise ValueError(f"Unknown pool type: {pool!r} (expected 'process' or 'thread')")
+		if isinstance(template, TemplatePlan):
+			raise ValueError("Rendering with workers needs a template name, not a compiled plan")
+		layer = compile_template(template, *compile_args, image_size=image.size).bake(image, static_mapping)
+		# Archive entries are encoded by the workers and written here, one after another
+		task = _batch_worker_render if sink is None else _batch_worker_encode
+		started = time.perf_counter()
+		count = 0
+		if pool == "process":
+			# Decode and bake once here; workers map both images from shared memory
+			shared = [_SharedImage(image)]
+			if layer.static:
+				shared.append(_SharedImage(layer.image))
+			del image, layer
+			try:
+				initargs = (template, shared[0].spec, shared[-1].spec, compile_args, static_mapping, output_args)
+				rows_as_dicts = ((index, (dict(row), name)) for index, (row, name) in indexed_rows)
+				for index, result in _render_batch_pool(rows_as_dicts, workers, ordered, max(1, chunk_size), _batch_worker_init,
+														initargs, task=task):
+					count += 1
+					yield index, _store_batch_result(sink, result)
+			finally:
+				for shared_image in shared:
+					shared_image.close()
+		else:
+			initargs = (template, layer, compile_args, output_args)
+			for index, result in _render_batch_pool(indexed_rows, workers, ordered, max(1, chunk_size), _batch_thread_init,
+													initargs, ThreadPoolExecutor, task):
+				count += 1
+				yield index, _store_batch_result(sink, result)
+		if stats is not None:
+			# Workers render and save each row themselves, so only the total is known
+			stats.update(rows=count, render_seconds=time.perf_counter() - started)
+		return
+	
+	if isinstance(template, TemplatePlan):
+		plan = template
+	else:
+		plan = compile_template(template, *compile_args, image_size=image.size)
+	layer = plan.bake(image, static_mapping)
+	_debug(f"DEBUG: Baked static fields: {list(layer.static)}")
+	# Rows are encoded (and written, unless they go to an archive) on the writer's
+	# threads while the next ones render; results are yielded in order as they land
+	own_writer = writer is None
+	if own_writer:
+		writer = OutputWriter()
+	render_seconds = 0.0
+	pending = deque()
+	max_pending = writer.workers * 4
+	try:
+		for index, (row, name) in indexed_rows:
+			started = time.perf_counter()
+			target, image_format, save_params = _batch_row_target(name, *output_args)
+			image = layer.render(row).convert("RGB")
+			render_seconds += time.perf_counter() - started
+			if sink is None:
+				pending.append((index, target, writer.submit(image, target, image_format, **save_params)))
+			else:
+				pending.append((index, target, writer.encode(image, image_format, **save_params)))
+			del image
+			# Encoded archive entries wait here for their turn, so cap how many can pile up
+			# (file writes are bounded by the writer, and may wait on a batched fsync)
+			while pending and (pending[0][2].done() or (sink is not None and len(pending) > max_pending)):
+				index, target, result = pending.popleft()
+				yield index, result.result() if sink is None else _store_batch_result(sink, (target, result.result()))
+		writer.flush()
+		while pending:
+			index, target, result = pending.popleft()
+			yield index, result.result() if sink is None else _store_batch_result(sink, (target, result.result()))
+	finally:
+		if own_writer:
+			writer.close()
+	if stats is not None:
+		stats.update(writer.stats, rows=layer.stats["rows"], render_seconds=render_seconds)
+	_debug(f"DEBUG: Batch finished: {layer.stats['rows']} rows, {layer.stats['fallbacks']} full redraws")
+
+def benchmark_batch(template, base_image, rows, workers=None, limit=None) -> dict:
+	"""
+	Render the same batch serially, on a thread pool and on a process pool.
+	
+	Args:
+		template: Template name
+		base_image: Path to the base image
+		rows: CSV/TSV/JSONL path or iterable of mappings (see iter_rows)
+		workers: Pool size (defaults to the CPU count)
+		limit: Only use the first this many rows
+	
+	Returns:
+		dict: Mode ("serial", "threads", "processes") -> seconds; outputs go to temporary folders
+	"""
+	rows = list(itertools.islice(iter_rows(rows), limit))
+	workers = workers or os.cpu_count() or 1
+	timings = {}
+	for mode, options in (("serial", {}),
+						  ("threads", {"workers": workers, "pool": "thread"}),
+						  ("processes", {"workers": workers, "pool": "process"})):
+		with tempfile.TemporaryDirectory() as output_dir:
+			started = time.perf_counter()
+			for _ in render_batch(template, base_image, rows, output_dir, **options):
+				pass
+			timings[mode] = time.perf_counter() - started
+	return timings
+
+class Stamp:
+	"""
+	A line of text rendered once into a coverage mask, for pasting onto many images.
+	
+	Negative x/y in `position` count from the right/bottom edge of each image to the
+	text's far side, so one stamp fits photos of any size (e.g. (-20, -20) puts it in
+	the bottom-right corner with a 20px margin). Opaque stamps give the same pixels
+	as create_image_with_text; translucent ones blend the mask with the opacity.
+	"""
+	
+	def __init__(self, text, position, text_color=(0, 0, 0), font_size=20, font_style="default", opacity=100, font_fallbacks=None):
+		if not text or not isinstance(text, str):
+			raise ValueError("Text must be a non-empty string")
+		if not position or len(position) != 2:
+			raise ValueError("Position must be a tuple of (x, y)")
+		if not isinstance(font_size, int) or font_size <= 0:
+			raise ValueError("Font size must be a positive integer")
+		font = _load_font(font_style, font_size)
+		fallback_fonts = _load_fallback_fonts(font_fallbacks, font_size)
+		mask, (left, top) = _text_coverage(text, font, _text_runs(text, font, fallback_fonts))
+		opacity = _clamp_opacity(opacity)
+		if opacity < 100:
+			alpha = int(255 * (opacity / 100))
+			mask = mask.point(lambda value: value * alpha // 255)
+		self.mask = mask
+		self.offset = (left, top)
+		self.position = tuple(int(value) for value in position)
+		self.color = _normalize_color(text_color)
+		# Everything the output depends on, so a rerun with other settings redraws every file
+		self.signature = hashlib.sha1(json.dumps([
+			text, self.position, self.color, font_size, _font_identity(font, font_style), opacity,
+			[_font_identity(fallback) for fallback in fallback_fonts or []],
+		]).encode("utf-8")).hexdigest()
+	
+	def origin(self, size):
+		"""Top-left corner of the mask on an image of the given size."""
+		x, y = self.position
+		left = size[0] + x - self.mask.width if x < 0 else x + self.offset[0]
+		top = size[1] + y - self.mask.height if y < 0 else y + self.offset[1]
+		return left, top
+	
+	def apply(self, image: Image.Image) -> Image.Image:
+		"""Paste the stamp onto an RGB or RGBA image in place and return it."""
+		image.paste(self.color, self.origin(image.size), self.mask)
+		return image
+
+def _iter_image_files(root, exclude=None):
+	"""
+	Yield paths of image files under root, relative to it, walking one directory at a time.
+	
+	Files come in scandir order as they are read, so a huge flat folder is never
+	held in memory; only subdirectory names are kept (and sorted) for the walk.
+	"""
+	pending = [""]
+	while pending:
+		relative_dir = pending.pop()
+		subdirs = []
+		try:
+			with os.scandir(os.path.join(root, relative_dir)) as entries:
+				for entry in entries:
+					relative_path = os.path.join(relative_dir, entry.name)
+					if entry.is_dir(follow_symlinks=False):
+						if exclude is None or os.path.abspath(entry.path) != exclude:
+							subdirs.append(relative_path)
+					elif os.path.splitext(entry.name)[1].lower() in STAMP_IMAGE_EXTENSIONS and entry.is_file():
+						yield relative_path
+		except OSError as e:
+			print(f"Warning: Could not read directory {os.path.join(root, relative_dir)}: {e}")
+		pending.extend(sorted(subdirs, reverse=True))
+
+def _stamp_file(stamp, input_dir, output_dir, relative_path, force=False) -> str:
+	"""
+	Stamp one file into the output tree.
+	
+	The output gets the input's modification time, which is how a rerun recognises
+	files that are already done. Returns "stamped", "skipped" or "failed".
+	"""
+	input_path = os.path.join(input_dir, relative_path)
+	output_path = os.path.join(output_dir, relative_path)
+	try:
+		source_stat = os.stat(input_path)
+		if not force:
+			try:
+				if os.stat(output_path).st_mtime_ns == source_stat.st_mtime_ns:
+					return "skipped"
+			except FileNotFoundError:
+				pass
+		with Image.open(input_path) as source:
+			image_format = source.format
+			info = {key: source.info[key] for key in ("exif", "icc_profile") if source.info.get(key)}
+			has_alpha = "A" in source.getbands() or "transparency" in source.info
+			image = source.convert("RGBA" if has_alpha else "RGB")
+		stamp.apply(image)
+		os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+		_save_image_atomic(image, output_path, image_format, times_ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns), **info)
+	except (OSError, ValueError, Image.DecompressionBombError) as e:
+		print(f"Warning: Could not stamp {input_path}: {e}")
+		return "failed"
+	return "stamped"
+
+def _stamp_worker_init(stamp, input_dir, output_dir, force):
+	_BATCH_WORKER.state = (stamp, input_dir, output_dir, force)
+
+def _stamp_worker_render(chunk) -> list:
+	stamp, input_dir, output_dir, force = _BATCH_WORKER.state
+	return [(index, (relative_path, _stamp_file(stamp, input_dir, output_dir, relative_path, force)))
+			for index, relative_path in chunk]
+
+def stamp_directory(input_dir, output_dir, text, position, text_color=(0, 0, 0), font_size=20, font_style="default",
+					opacity=100, font_fallbacks=None, workers=None, pool="process", chunk_size=BATCH_CHUNK_SIZE, force=False):
+	"""
+	Stamp the same text onto every image under a directory tree, as a generator.
+	
+	The tree is walked lazily and the text is rasterized once (see Stamp), then
+	pasted onto each image. Outputs mirror the input's relative paths and keep
+	each file's format, EXIF and ICC profile. Files whose output is already up to
+	date from a run with the same settings are skipped.
+	
+	Args:
+		input_dir: Root of the images to stamp
+		output_dir: Root of the stamped copies (may be inside input_dir; it isn't walked)
+		text, position, text_color, font_size, font_style, opacity, font_fallbacks: See Stamp
+		workers: Stamp on this many processes or threads
+		pool: "process" or "thread"
+		chunk_size: With workers, number of files handed to a worker at a time
+		force: Redo files even if their output looks up to date
+	
+	Yields:
+		tuple: (relative_path, status) with status "stamped", "skipped" or "failed"
+	"""
+	input_dir = os.path.abspath(os.fspath(input_dir))
+	output_dir = os.path.abspath(os.fspath(output_dir))
+	if not os.path.isdir(input_dir):
+		raise ValueError(f"Input directory not found: {input_dir}")
+	if input_dir == output_dir:
+		raise ValueError("Output directory must differ from the input directory")
+	os.makedirs(output_dir, exist_ok=True)
+	
+	stamp = Stamp(text, position, text_color, font_size, font_style, opacity, font_fallbacks)
+	manifest_path = os.path.join(output_dir, STAMP_MANIFEST_FILE)
+	try:
+		with open(manifest_path, "r") as f:
+			previous = json.load(f).get("stamp")
+	except (OSError, ValueError, AttributeError):
+		previous = None
+	force = force or previous != stamp.signature
+	
+	files = enumerate(_iter_image_files(input_dir, exclude=output_dir), 1)
+	counts = {"stamped": 0, "skipped": 0, "failed": 0}
+	if workers and workers > 1:
+		if pool not in ("process", "thread"):
+			raise ValueError(f"Unknown pool type: {pool!r} (expected 'process' or 'thread')")
+		executor_class = ProcessPoolExecutor if pool == "process" else ThreadPoolExecutor
+		results = (result for _, result in _render_batch_pool(files, workers, False, max(1, chunk_size), _stamp_worker_init,
+																 (stamp, input_dir, output_dir, force), executor_class,
+																 _stamp_worker_render))
+	else:
+		results = ((relative_path, _stamp_file(stamp, input_dir, output_dir, relative_path, force)) for _, relative_path in files)
+	for relative_path, status in results:
+		counts[status] += 1
+		yield relative_path, status
+	
+	# Record the settings only after a full pass, so an interrupted rerun with new settings starts over
+	if previous != stamp.signature:
+		_write_json_atomic(manifest_path, {"stamp": stamp.signature})
+	_debug(f"DEBUG: Stamp finished: {counts}")
+
+def benchmark_encoders(image, profiles=None, formats=None, repeat=3) -> list:
+	"""
+	Encode one image under each encoder profile and format, in memory, and time it.
+	
+	Args:
+		image: PIL Image or path to one (e.g. a typical rendered output)
+		profiles: Profile names to try (default: all)
+		formats: Formats to try, e.g. ["PNG", "JPEG"] (default: PNG, JPEG, WEBP and
+			AVIF where Pillow supports them); a profile that converts to a fixed
+			format is only measured in that one
+		repeat: Encodes per combination; the fastest is reported
+	
+	Returns:
+		list: One dict per combination: profile, format, bytes, seconds
+	"""
+	if not isinstance(image, Image.Image):
+		image = _open_base_image(image)
+	image = image.convert("RGB")
+	if formats is None:
+		Image.init()
+		formats = [name for name in ("PNG", "JPEG", "WEBP", "AVIF") if name in Image.SAVE]
+	results = []
+	available = get_encoder_profiles()
+	for profile in profiles or list_encoder_profiles():
+		if profile not in available:
+			raise ValueError(f"Unknown encoder profile: {profile!r} (available: {', '.join(list_encoder_profiles())})")
+		fixed_format = available[profile].get("format")
+		for image_format in [fixed_format] if fixed_format else formats:
+			image_format = image_format.upper()
+			_, resolved_format, params = resolve_encoder_profile(profile, "bench" + _FORMAT_EXTENSIONS.get(image_format, f".{image_format.lower()}"))
+			best = None
+			for _ in range(max(1, repeat)):
+				buffer = io.BytesIO()
+				started = time.perf_counter()
+				image.save(buffer, format=resolved_format, **params)
+				elapsed = time.perf_counter() - started
+				best = elapsed if best is None else min(best, elapsed)
+			results.append({"profile": profile, "format": resolved_format, "bytes": buffer.tell(), "seconds": best})
+	return results
+
 def apply_template_interactive(image_path, template_name, text_color=(0, 0, 0), font_size=20, opacity=100) -> Image.Image:
 	"""
 	Interactive version - prompts user for text for each coordinate in template.
@@ -457,12 +3261,7 @@ def apply_template_interactive(image_path, template_name, text_color=(0, 0, 0),
 		Image.Image: The edited image
 	"""
 	# Load the template
-	template_path = get_user_data_path("coord_templates", f"{template_name}.json")
-	if not os.path.exists(template_path):
-		raise FileNotFoundError(f"Template not found: {template_path}")
-	
-	with open(template_path, "r") as f:
-		coords = json.load(f)
+	coords = load_template(template_name)
 	
 	# Setup Tkinter for dialogs
 	root = tk.Tk()
@@ -470,7 +3269,7 @@ def apply_template_interactive(image_path, template_name, text_color=(0, 0, 0),
 	
 	# Collect text for each coordinate
 	text_mapping = {}
-	for point_name, point_data in coords.items():
+	for point_name, point_data in template_fields(coords):
 		text = simpledialog.askstring(
 			"Enter Text", 
 			f"Enter text for '{point_name}' at ({point_data['x']}, {point_data['y']}):",
@@ -484,15 +3283,265 @@ def apply_template_interactive(image_path, template_name, text_color=(0, 0, 0),
 	# Use the main function to apply texts
 	return apply_template_to_image(image_path, template_name, text_mapping, text_color, font_size, opacity=opacity)
 
-def list_templates(_print=False) -> list:
+class LivePreview:
+	"""
+	Downscaled, layered preview of a template being filled in.
+	
+	Keeps a proxy of the base image scaled to fit max_size and one small RGBA layer
+	per field. update() re-rasterizes only the fields whose settings changed, and
+	render() composites the cached layers over the proxy in field order. Fields are
+	drawn like the full-size render, including fallback fonts and tiled watermarks.
+	"""
+	
+	def __init__(self, image_path, max_size=(600, 750)):
+		image = Image.open(image_path)
+		self.image_path = image_path
+		self.source_size = image.size
+		# thumbnail() lets JPEG decode straight at a reduced scale
+		image.thumbnail(max_size, Image.Resampling.BILINEAR)
+		self.proxy = image.convert("RGBA")
+		self.scale = self.proxy.width / self.source_size[0]
+		self.layers = {}
+		self.order = []
+	
+	def _rasterize(self, x, y, text, font_style, font_size, color, opacity, font_fallbacks=(), tiling=None):
+		"""Return (layer, offset) for one field at proxy scale, or None if it draws nothing."""
+		opacity = _clamp_opacity(opacity)
+		if not text or opacity <= 0:
+			return None
+		size = max(1, round(font_size * self.scale))
+		font = _load_font(font_style, size)
+		fallback_fonts = _load_fallback_fonts(font_fallbacks, size)
+		position = (x * self.scale, y * self.scale)
+		rgb = _normalize_color(color)
+		if tiling:
+			# The pattern covers the whole image; its pieces already carry the opacity
+			layer = Image.new("RGBA", self.proxy.size, (*rgb, 0))
+			angle, spacing = tiling
+			return _draw_tiled(layer, text, rgb, font, opacity, fallback_fonts, (angle, round(spacing * self.scale)), position), (0, 0)
+		runs = _text_runs(text, font, fallback_fonts)
+		box = _clip_box(_text_bbox(ImageDraw.Draw(self.proxy), position, text, font, runs), self.proxy.size)
+		if box is None:
+			return None
+		# Match the full-size render: opaque text blends its own color at the edges,
+		# translucent text is drawn on a transparent black overlay
+		layer = Image.new("RGBA", (box[2] - box[0], box[3] - box[1]), (*rgb, 0) if opacity >= 100 else (0, 0, 0, 0))
+		local_position = (position[0] - box[0], position[1] - box[1])
+		fill = (*rgb, int(255 * (opacity / 100)))
+		if runs:
+			_draw_runs(layer, local_position, runs, fill, font)
+		else:
+			_paste_text(layer, local_position, text, fill, font)
+		return layer, box[:2]
+	
+	def update(self, fields) -> int:
+		"""
+		Set the preview's fields, re-rasterizing only those that changed.
+		
+		Args:
+			fields: Iterable of (name, x, y, text, font_style, font_size, color, opacity) in draw
+				order, optionally followed by font_fallbacks (a tuple of font names) and tiling
+				((angle, spacing) at full size, see field_tiling)
+		
+		Returns:
+			int: Number of layers that were re-rasterized
+		"""
+		changed = 0
+		order = []
+		for name, *settings in fields:
+			settings = tuple(settings)
+			order.append(name)
+			current = self.layers.get(name)
+			if current is not None and current[0] == settings:
+				continue
+			self.layers[name] = (settings, self._rasterize(*settings))
+			changed += 1
+		for name in set(self.layers) - set(order):
+			del self.layers[name]
+		self.order = order
+		return changed
+	
+	def render(self) -> Image.Image:
+		"""Composite the cached field layers over the proxy."""
+		image = self.proxy.copy()
+		for name in self.order:
+			layer = self.layers[name][1]
+			if layer is not None:
+				image.alpha_composite(layer[0], dest=layer[1])
+		return image.convert("RGB")
+
+class TemplateStore:
+	"""
+	SQLite index of the coord_templates/ directory.
+	
+	Records name, field count, image size, mtime, size and a content hash per
+	template, so listing, prefix search and paging don't touch the template files.
+	The index is synced incrementally: while the directory's mtime is unchanged a
+	read costs one stat. Otherwise, and every TEMPLATE_INDEX_RESTAT_SECONDS to catch
+	templates other programs rewrote in place (which doesn't always change the
+	directory's mtime), each file's (mtime, size) is compared with its row and only
+	new or modified files are read.
+	"""
+	
+	def __init__(self, templates_dir=None, index_path=None):
+		self.templates_dir = templates_dir or get_user_data_path("coord_templates")
+		self.index_path = index_path or get_user_data_path(TEMPLATE_INDEX_FILE)
+		self._lock = threading.RLock()
+		self._conn = None
+		self._restat_at = None
+	
+	def _connect(self):
+		if self._conn is None:
+			directory = os.path.dirname(self.index_path)
+			if directory:
+				os.makedirs(directory, exist_ok=True)
+			try:
+				self._conn = self._open_index()
+			except sqlite3.DatabaseError:
+				# Corrupt index: it only holds derived data, so start over
+				os.remove(self.index_path)
+				self._conn = self._open_index()
+		return self._conn
+	
+	def _open_index(self):
+		conn = sqlite3.connect(self.index_path, check_same_thread=False)
+		conn.execute(
+			"CREATE TABLE IF NOT EXISTS templates ("
+			"name TEXT PRIMARY KEY, field_count INTEGER NOT NULL, "
+			"image_width INTEGER, image_height INTEGER, "
+			"mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, sha1 TEXT NOT NULL)"
+		)
+		conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+		conn.commit()
+		return conn
+	
+	def _read_entry(self, path):
+		"""Return (field_count, sha1) for a template file."""
+		with open(path, "rb") as f:
+			data = f.read()
+		try:
+			field_count = sum(1 for _ in template_fields(json.loads(data)))
+		except (ValueError, AttributeError):
+			field_count = 0
+		return field_count, hashlib.sha1(data).hexdigest()
+	
+	def sync(self, force=False) -> None:
+		"""Bring the index in line with the templates directory (force=True re-reads every file)."""
+		with self._lock:
+			conn = self._connect()
+			dir_mtime = _dir_mtime(self.templates_dir)
+			row = conn.execute("SELECT value FROM meta WHERE key = 'dir_mtime'").fetchone()
+			entries_changed = force or row is None or row[0] != str(dir_mtime)
+			now = time.monotonic()
+			if (not entries_changed and self._restat_at is not None
+					and now - self._restat_at < TEMPLATE_INDEX_RESTAT_SECONDS):
+				return
+			self._restat_at = now
+
+			known = {name: (mtime_ns, size) for name, mtime_ns, size in
+					 conn.execute("SELECT name, mtime_ns, size FROM templates")}
+			seen = set()
+			if dir_mtime is not None:
+				with os.scandir(self.templates_dir) as entries:
+					for entry in entries:
+						if not entry.name.endswith(".json") or not entry.is_file():
+							continue
+						name = entry.name[:-len(".json")]
+						seen.add(name)
+						st = entry.stat()
+						if not force and known.get(name) == (st.st_mtime_ns, st.st_size):
+							continue
+						self._upsert(conn, name, entry.path, st)
+			if entries_changed:
+				removed = [name for name in known if name not in seen]
+				conn.executemany("DELETE FROM templates WHERE name = ?", [(name,) for name in removed])
+				conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('dir_mtime', ?)", (str(dir_mtime),))
+			conn.commit()
+	
+	def _upsert(self, conn, name, path, st) -> None:
+		try:
+			field_count, sha1 = self._read_entry(path)
+		except OSError:
+			return
+		# Keep image size (only known from template creation) when a template changes
+		conn.execute(
+			"INSERT INTO templates (name, field_count, mtime_ns, size, sha1) VALUES (?, ?, ?, ?, ?) "
+			"ON CONFLICT(name) DO UPDATE SET field_count = excluded.field_count, "
+			"mtime_ns = excluded.mtime_ns, size = excluded.size, sha1 = excluded.sha1",
+			(name, field_count, st.st_mtime_ns, st.st_size, sha1)
+		)
+	
+	def refresh(self, name, image_size=None) -> None:
+		"""Re-index one template after writing it (and optionally record its image size)."""
+		path = os.path.join(self.templates_dir, f"{name}.json")
+		with self._lock:
+			conn = self._connect()
+			try:
+				st = os.stat(path)
+			except OSError:
+				conn.execute("DELETE FROM templates WHERE name = ?", (name,))
+			else:
+				self._upsert(conn, name, path, st)
+				if image_size:
+					conn.execute("UPDATE templates SET image_width = ?, image_height = ? WHERE name = ?",
+								 (int(image_size[0]), int(image_size[1]), name))
+			conn.commit()
+	
+	def _prefix_clause(self, prefix):
+		if not prefix:
+			return "", ()
+		return " WHERE name >= ? AND name < ?", (prefix, prefix + "\U0010ffff")
+	
+	def list(self, prefix="", limit=None, offset=0) -> list:
+		"""Return template names in name order, optionally filtered by prefix and paged."""
+		self.sync()
+		where, params = self._prefix_clause(prefix)
+		query = f"SELECT name FROM templates{where} ORDER BY name LIMIT ? OFFSET ?"
+		with self._lock:
+			rows = self._connect().execute(query, params + (-1 if limit is None else int(limit), int(offset)))
+			return [name for (name,) in rows]
+	
+	def count(self, prefix="") -> int:
+		"""Return the number of templates matching a prefix."""
+		self.sync()
+		where, params = self._prefix_clause(prefix)
+		with self._lock:
+			return self._connect().execute(f"SELECT COUNT(*) FROM templates{where}", params).fetchone()[0]
+	
+	def info(self, name):
+		"""Return the indexed metadata of a template, or None if it doesn't exist."""
+		self.sync()
+		with self._lock:
+			row = self._connect().execute(
+				"SELECT name, field_count, image_width, image_height, mtime_ns, size, sha1 FROM templates WHERE name = ?",
+				(name,)
+			).fetchone()
+		if row is None:
+			return None
+		keys = ("name", "field_count", "image_width", "image_height", "mtime_ns", "size", "sha1")
+		return dict(zip(keys, row))
+
+
+def get_template_store() -> TemplateStore:
+	"""Return the shared TemplateStore for the user's coord_templates/ directory."""
+	global _TEMPLATE_STORE
+	with _TEMPLATE_STORE_LOCK:
+		if _TEMPLATE_STORE is None:
+			_TEMPLATE_STORE = TemplateStore()
+		return _TEMPLATE_STORE
+
+def list_templates(_print=False, prefix="", limit=None, offset=0) -> list:
 	"""
 	List all available coordinate templates.
 	
 	Args:
-		show_details: If True, prints coordinate names for each template
+		_print: If True, prints the template names
+		prefix: Only list templates whose name starts with this prefix
+		limit: Maximum number of names to return (None for all)
+		offset: Number of matching names to skip, for paging
 	
 	Returns:
-		list: List of template names (without .json extension)
+		list: List of template names (without .json extension), sorted by name
 	"""
 	templates_dir = get_user_data_path("coord_templates")
 	
@@ -500,7 +3549,7 @@ def list_templates(_print=False) -> list:
 		print("No templates directory found.")
 		return []
 	
-	templates = [f.replace(".json", "") for f in os.listdir(templates_dir) if f.endswith(".json")]
+	templates = get_template_store().list(prefix=prefix, limit=limit, offset=offset)
 	
 	if not templates:
 		print("No templates found.")
@@ -523,16 +3572,13 @@ def update_template_fonts(template_name, font_updates: dict) -> None:
 			Example: {"name": {"font_size": 25, "font_color": "red", "font_style": "bold"}}
 	"""
 	template_path = get_user_data_path("coord_templates", f"{template_name}.json")
-	if not os.path.exists(template_path):
-		raise FileNotFoundError(f"Template not found: {template_path}")
 	
-	# Load existing template
-	with open(template_path, "r") as f:
-		coords = json.load(f)
+	# Load existing template (as a mutable copy of the cached one)
+	coords = _thaw(load_template(template_name))
 	
 	# Update font settings for specified points
 	for point_name, font_settings in font_updates.items():
-		if point_name in coords:
+		if isinstance(coords.get(point_name), dict):
 			if "font_size" in font_settings:
 				coords[point_name]["font_size"] = font_settings["font_size"]
 			if "font_color" in font_settings:
@@ -541,15 +3587,245 @@ def update_template_fonts(template_name, font_updates: dict) -> None:
 				coords[point_name]["font_style"] = font_settings["font_style"]
 			if "opacity" in font_settings:
 				coords[point_name]["opacity"] = _clamp_opacity(font_settings["opacity"])
+			if "font_fallbacks" in font_settings:
+				coords[point_name]["font_fallbacks"] = list(font_settings["font_fallbacks"] or [])
 			print(f"Updated font settings for '{point_name}'")
 		else:
 			print(f"Warning: Point '{point_name}' not found in template")
 	
-	# Save updated template
-	template_dir = os.path.dirname(template_path)
-	if template_dir:
-		os.makedirs(template_dir, exist_ok=True)
-	with open(template_path, "w") as f:
-		json.dump(coords, f, indent=4)
+	# Save updated template (temp file + rename, so a crash never leaves half-written JSON)
+	_write_json_atomic(template_path, coords, indent=4)
+	_forget_template(template_name)
+	get_template_store().refresh(template_name)
 	print(f"Template '{template_name}' updated successfully")
 
+# Values a template field falls back to when a setting is missing (used for rule matching)
+_FIELD_DEFAULTS = {"font_size": 20, "font_color": "black", "font_style": "default", "opacity": 100}
+
+def _apply_font_rule(coords: dict, rule: dict) -> dict:
+	"""Apply a font migration rule to a template's fields in place and return the changes per field."""
+	match = rule.get("match") or {}
+	updates = rule.get("set") or {}
+	size_delta = int(rule.get("font_size_delta", 0) or 0)
+	changes = {}
+	for point_name, point_data in coords.items():
+		if not isinstance(point_data, dict):
+			continue
+		if any(point_data.get(key, _FIELD_DEFAULTS.get(key)) != value for key, value in match.items()):
+			continue
+		new_values = {}
+		for key, value in updates.items():
+			new_values[key] = _clamp_opacity(value) if key == "opacity" else value
+		if size_delta:
+			size = new_values.get("font_size", point_data.get("font_size", _FIELD_DEFAULTS["font_size"]))
+			new_values["font_size"] = max(1, int(size) + size_delta)
+		field_changes = {}
+		for key, value in new_values.items():
+			old = point_data.get(key)
+			if old != value:
+				field_changes[key] = (old, value)
+				point_data[key] = value
+		if field_changes:
+			changes[point_name] = field_changes
+	return changes
+
+def _migrate_template_fonts(template_name, rule: dict, dry_run=False) -> dict:
+	"""Worker for bulk_update_template_fonts: update one template and report what changed."""
+	try:
+		coords = _thaw(load_template(template_name))
+		changes = _apply_font_rule(coords, rule)
+		if changes and not dry_run:
+			_write_json_atomic(get_user_data_path("coord_templates", f"{template_name}.json"), coords, indent=4)
+			_forget_template(template_name)
+		return {"template": template_name, "changes": changes}
+	except Exception as e:
+		return {"template": template_name, "changes": {}, "error": str(e)}
+
+def bulk_update_template_fonts(rule: dict, templates=None, prefix="", workers=None, dry_run=False) -> list:
+	"""
+	Apply one font rule to many templates in parallel, writing each file atomically.
+	
+	Args:
+		rule: Which fields to change and how, e.g. "every field using X -> Y at +2pt":
+			{"match": {"font_style": "X"}, "set": {"font_style": "Y"}, "font_size_delta": 2}
+			"match" and "set" accept font_size, font_color, font_style and opacity.
+		templates: Template names to update (default: all templates, or those matching prefix)
+		prefix: Only update templates whose name starts with this prefix
+		workers: Number of worker threads (default: ThreadPoolExecutor's default)
+		dry_run: If True, report the changes without writing anything
+	
+	Returns:
+		list: One {"template", "changes"[, "error"]} dict per template that changed or failed,
+			where changes maps field names to {setting: (old, new)}
+	"""
+	if not isinstance(rule, dict) or not (rule.get("set") or rule.get("font_size_delta")):
+		raise ValueError("Rule must set at least one font setting or a font_size_delta")
+	if templates is None:
+		templates = get_template_store().list(prefix=prefix)
+	
+	with ThreadPoolExecutor(max_workers=workers) as pool:
+		results = list(pool.map(lambda name: _migrate_template_fonts(name, rule, dry_run), templates))
+	if not dry_run:
+		# One incremental index sync instead of a commit per template
+		get_template_store().sync()
+	return [result for result in results if result["changes"] or "error" in result]
+
+def _cli_migrate_fonts(args) -> int:
+	rule = {"match": {}, "set": {}, "font_size_delta": args.size_delta}
+	for key in ("font_style", "font_color", "font_size", "opacity"):
+		value = getattr(args, f"match_{key}")
+		if value is not None:
+			rule["match"][key] = value
+		value = getattr(args, f"set_{key}")
+		if value is not None:
+			rule["set"][key] = value
+	
+	started = time.perf_counter()
+	report = bulk_update_template_fonts(rule, templates=args.template or None, prefix=args.prefix,
+										workers=args.workers, dry_run=args.dry_run)
+	elapsed = time.perf_counter() - started
+	
+	failed = 0
+	for entry in report:
+		if "error" in entry:
+			failed += 1
+			print(f"Error: {entry['template']}: {entry['error']}")
+			continue
+		print(f"{entry['template']}:")
+		for point_name, field_changes in entry["changes"].items():
+			settings = ", ".join(f"{key} {old!r} -> {new!r}" for key, (old, new) in field_changes.items())
+			print(f"  - {point_name}: {settings}")
+	action = "would change" if args.dry_run else "changed"
+	print(f"{len(report) - failed} template(s) {action}, {failed} failed in {elapsed:.2f}s")
+	return 1 if failed else 0
+
+def _cli_render_batch(args) -> int:
+	started = time.perf_counter()
+	count = 0
+	stats = {}
+	with OutputWriter(args.writer_threads, fsync_batch=args.fsync_batch) as writer:
+		for _, output_path in render_batch(args.template, args.image, args.rows, args.output_dir, args.name_pattern,
+											 args.color, args.font_size, workers=args.workers,
+											 ordered=not args.unordered, chunk_size=args.chunk_size, pool=args.pool,
+											 writer=writer, stats=stats, encoder_profile=args.encoder_profile,
+											 archive=args.archive, shard_levels=args.shard_levels, overwrite=args.overwrite):
+			count += 1
+			_debug(f"DEBUG: {output_path}")
+	elapsed = time.perf_counter() - started
+	print(f"Rendered {count} image(s) in {elapsed:.2f}s" + (f" into {args.archive}" if args.archive else ""))
+	if stats.get("files"):
+		# Throughput of each stage on its own: rendering on this thread, encoding per writer thread
+		render_rate = stats["rows"] / stats["render_seconds"] if stats["render_seconds"] else 0.0
+		encode_rate = stats["files"] / stats["encode_seconds"] if stats["encode_seconds"] else 0.0
+		print(f"  render {render_rate:10.1f} images/s ({stats['render_seconds']:.2f}s)")
+		print(f"  encode {encode_rate:10.1f} images/s per thread ({stats['encode_seconds']:.2f}s on {writer.workers} thread(s), "
+			  f"{stats['bytes'] / 1048576:.1f} MB)")
+		print(f"  waited {stats['wait_seconds']:.2f}s for the writer queue")
+	return 0
+
+def _cli_benchmark_batch(args) -> int:
+	rows = list(itertools.islice(iter_rows(args.rows), args.limit))
+	timings = benchmark_batch(args.template, args.image, rows, args.workers)
+	workers = args.workers or os.cpu_count() or 1
+	print(f"{len(rows)} rows, {workers} workers")
+	for mode, seconds in timings.items():
+		rate = len(rows) / seconds if seconds else 0.0
+		print(f"  {mode:<10} {seconds:8.2f}s {rate:10.1f} rows/s  x{timings['serial'] / seconds:.2f}")
+	return 0
+
+def _cli_benchmark_encoders(args) -> int:
+	results = benchmark_encoders(args.image, args.profile, [name.upper() for name in args.format] if args.format else None, args.repeat)
+	print(f"{'profile':<12} {'format':<6} {'bytes':>12} {'encode':>10}")
+	for result in results:
+		print(f"{result['profile']:<12} {result['format']:<6} {result['bytes']:>12,} {result['seconds'] * 1000:>8.1f}ms")
+	return 0
+
+def _cli_stamp_dir(args) -> int:
+	started = time.perf_counter()
+	counts = {"stamped": 0, "skipped": 0, "failed": 0}
+	for relative_path, status in stamp_directory(args.input_dir, args.output_dir, args.text, (args.x, args.y), args.color,
+												 args.font_size, args.font_style, args.opacity, workers=args.workers,
+												 pool=args.pool, chunk_size=args.chunk_size, force=args.force):
+		counts[status] += 1
+		_debug(f"DEBUG: {status}: {relative_path}")
+	elapsed = time.perf_counter() - started
+	print(f"Stamped {counts['stamped']}, skipped {counts['skipped']}, failed {counts['failed']} in {elapsed:.2f}s")
+	return 1 if counts["failed"] else 0
+
+def main(argv=None) -> int:
+	"""Command-line entry point: python functions.py <command> ..."""
+	parser = argparse.ArgumentParser(prog="functions.py", description=f"{APP_NAME} command-line tools")
+	commands = parser.add_subparsers(dest="command", required=True)
+	
+	migrate = commands.add_parser("migrate-fonts", help="Bulk-update font settings across templates")
+	migrate.add_argument("--template", action="append", help="Template to update (repeatable; default: all)")
+	migrate.add_argument("--prefix", default="", help="Only update templates whose name starts with this")
+	for key, value_type in (("font_style", str), ("font_color", str), ("font_size", int), ("opacity", int)):
+		option = key.replace("_", "-")
+		migrate.add_argument(f"--match-{option}", dest=f"match_{key}", type=value_type, help=f"Only change fields whose {key} equals this")
+		migrate.add_argument(f"--set-{option}", dest=f"set_{key}", type=value_type, help=f"New {key}")
+	migrate.add_argument("--size-delta", type=int, default=0, help="Add this many points to the font size")
+	migrate.add_argument("--workers", type=int, default=None, help="Number of worker threads")
+	migrate.add_argument("--dry-run", action="store_true", help="Only report what would change")
+	migrate.set_defaults(handler=_cli_migrate_fonts)
+	
+	batch = commands.add_parser("render-batch", help="Render a template once per row of a CSV/JSONL file")
+	batch.add_argument("template", help="Template name")
+	batch.add_argument("image", help="Base image")
+	batch.add_argument("rows", help="CSV/TSV (header = point names) or JSONL file")
+	batch.add_argument("--output-dir", default=None, help="Output directory (default: app outputs/ folder)")
+	batch.add_argument("--name-pattern", default="{stem}_{index:06d}",
+					   help="Output file name pattern: columns, {index}, {stem}, {hash}, e.g. '{name}_{index:05d}.jpg'")
+	batch.add_argument("--shard-levels", type=int, default=None,
+					   help="Spread outputs over this many levels of hash-prefix folders (256 per level)")
+	batch.add_argument("--overwrite", action="store_true", help="Replace existing files instead of adding _2, _3, ... to the names")
+	batch.add_argument("--font-size", type=int, default=20, help="Default font size")
+	batch.add_argument("--color", default="black", help="Default text color")
+	batch.add_argument("--workers", type=int, default=None, help="Render on this many processes")
+	batch.add_argument("--chunk-size", type=int, default=BATCH_CHUNK_SIZE, help="Rows sent to a worker at a time")
+	batch.add_argument("--unordered", action="store_true", help="With --workers, report rows as they finish")
+	batch.add_argument("--pool", choices=("process", "thread"), default="process", help="Worker type for --workers")
+	batch.add_argument("--archive", default=None, help="Stream the images into this .zip or .tar file instead of --output-dir")
+	batch.add_argument("--encoder-profile", choices=list_encoder_profiles(), default=None,
+					   help="Save settings (default: the template's own, else Pillow's)")
+	batch.add_argument("--writer-threads", type=int, default=None, help="Threads encoding and writing images (without --workers)")
+	batch.add_argument("--fsync-batch", type=int, default=0, help="Flush written files to disk this many at a time (0: don't fsync)")
+	batch.set_defaults(handler=_cli_render_batch)
+	
+	bench = commands.add_parser("benchmark-batch", help="Time a batch serially, on threads and on processes")
+	bench.add_argument("template", help="Template name")
+	bench.add_argument("image", help="Base image")
+	bench.add_argument("rows", help="CSV/TSV (header = point names) or JSONL file")
+	bench.add_argument("--workers", type=int, default=None, help="Pool size (default: CPU count)")
+	bench.add_argument("--limit", type=int, default=None, help="Only use the first N rows")
+	bench.set_defaults(handler=_cli_benchmark_batch)
+	
+	encoders = commands.add_parser("benchmark-encoders", help="Compare output size and encode time of the encoder profiles")
+	encoders.add_argument("image", help="Sample image (ideally a typical rendered output)")
+	encoders.add_argument("--profile", action="append", help="Profile to include (repeatable; default: all)")
+	encoders.add_argument("--format", action="append", help="Format to include, e.g. PNG (repeatable; default: PNG, JPEG, WEBP, AVIF)")
+	encoders.add_argument("--repeat", type=int, default=3, help="Encodes per combination (fastest is shown)")
+	encoders.set_defaults(handler=_cli_benchmark_encoders)
+	
+	stamp = commands.add_parser("stamp-dir", help="Stamp the same text onto every image in a directory tree")
+	stamp.add_argument("input_dir", help="Directory of images (walked recursively)")
+	stamp.add_argument("output_dir", help="Directory for the stamped copies (same relative paths)")
+	stamp.add_argument("--text", required=True, help="Text to stamp")
+	stamp.add_argument("--x", type=int, default=-20, help="X position; negative counts from the right edge")
+	stamp.add_argument("--y", type=int, default=-20, help="Y position; negative counts from the bottom edge")
+	stamp.add_argument("--font-size", type=int, default=20, help="Font size")
+	stamp.add_argument("--font-style", default="default", help="Font name")
+	stamp.add_argument("--color", default="white", help="Text color")
+	stamp.add_argument("--opacity", type=int, default=100, help="Opacity (0-100)")
+	stamp.add_argument("--workers", type=int, default=None, help="Stamp on this many processes")
+	stamp.add_argument("--chunk-size", type=int, default=BATCH_CHUNK_SIZE, help="Files sent to a worker at a time")
+	stamp.add_argument("--pool", choices=("process", "thread"), default="process", help="Worker type for --workers")
+	stamp.add_argument("--force", action="store_true", help="Redo files whose output is up to date")
+	stamp.set_defaults(handler=_cli_stamp_dir)
+	
+	args = parser.parse_args(argv)
+	return args.handler(args)
+
+
+if __name__ == "__main__":
+	sys.exit(main())